@@ -5,6 +5,7 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
+from loader import parse_datetime
 
 
 # ==========================================
@@ -18,10 +19,7 @@ data = pd.read_excel(r"C:\Users\LeYu267\Documents\Adrian\SDG Hackathon\C1G14_We8
 # 3. Create datetime column
 # ==========================================
 
-data["datetime"] = pd.to_datetime(
-    data["Date"] + " " + data["Time"],
-    dayfirst=True
-)
+data["datetime"] = parse_datetime(data["Date"], data["Time"])
 
 data = data.drop(columns=["Date", "Time"])
 data = data.sort_values("datetime")
@@ -2,10 +2,11 @@ import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error
+from loader import parse_datetime
 
 # 1. Load data
 df = pd.read_excel(r"C:\Users\LeYu267\Documents\Adrian\SDG Hackathon\C1G14_We8Win_SourceCode\ML\household_power_cleaned.xlsx")
-df['datetime'] = pd.to_datetime(df['Date'] + ' ' + df['Time'], dayfirst=True)
+df['datetime'] = parse_datetime(df['Date'], df['Time'])
 df = df.set_index('datetime')
 df['Global_active_power'] = pd.to_numeric(df['Global_active_power'], errors='coerce')
 df = df.dropna(subset=['Global_active_power'])
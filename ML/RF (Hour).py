@@ -4,6 +4,7 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error
 from sklearn.ensemble import RandomForestRegressor
 import matplotlib.pyplot as plt
+from loader import parse_datetime
 
 # ============================================================
 # 1. LOAD DATA
@@ -11,7 +12,7 @@ import matplotlib.pyplot as plt
 df = pd.read_excel(r"C:\Users\LeYu267\Documents\Adrian\SDG Hackathon\C1G14_We8Win_SourceCode\ML\household_power_cleaned.xlsx")
 
 # Combine date + time into datetime
-df['datetime'] = pd.to_datetime(df['Date'] + ' ' + df['Time'], dayfirst=True)
+df['datetime'] = parse_datetime(df['Date'], df['Time'])
 df = df.set_index('datetime')
 
 # Convert Global_active_power to numeric
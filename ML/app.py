@@ -1,17 +1,72 @@
-from predictor import HourlyEnergyPredictor
-from predictor import EnergyPredictor
-from predictor import HourlyEnergyPredictor
-from efficiency_predictor import EfficiencyForecast24H, EfficiencyForecast7D
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
-from loader import load_data
-from processor import aggregate_week
+from loader import readings_to_frame
+from services import Services
+from forecast_cache import ForecastCache
+from dispatch import BoundedExecutor, Coalescer, Overloaded
+from live import LIVE_CHANNELS, Broadcaster, LiveFeed, LiveMonitor
+from refresh import ForestRefresher
+import metrics
+import serialize
+from metrics import timed
+from processor import GRANULARITIES, METRICS, aggregate, aggregate_week, beyond, pick_granularity
+from downsample import DOWNSAMPLERS
 from datetime import datetime, timedelta 
 from calendar import monthrange
+import numpy as np
 import pandas as pd
 import os
+import time
+
+def predictor_options():
+    """
+    Per-component predictor options from the environment, e.g.
+    ML_FORECAST_STRATEGY="hourly_predictor=direct" ML_MODEL_BACKEND="predictor=compiled,hourly_predictor=hist_gb"
+    """
+    options = {}
+    for option, variable in (("strategy", "ML_FORECAST_STRATEGY"), ("backend", "ML_MODEL_BACKEND")):
+        for item in filter(None, os.environ.get(variable, "").split(",")):
+            name, value = item.split("=", 1)
+            options.setdefault(name, {})[option] = value
+    return options
+
+# Data and predictors are built on first use (see services.py); the
+# analytics routes only need the data, which loads from the parsed cache.
+services = Services(
+    os.environ.get("ML_DATA_FILE", os.path.join(os.path.dirname(__file__), "household_power_cleaned.xlsx")),
+    # Fitted models come from the registry (built offline by train_models.py)
+    os.environ.get("ML_MODELS_DIR", os.path.join(os.path.dirname(__file__), "models")),
+    predictor_options(),
+)
+
+# Live monitoring stream: ingested readings, or a replay of the stored data
+# at ML_LIVE_REPLAY_SPEED minutes per second (0, the default, replays nothing)
+live = LiveFeed(LiveMonitor(window=int(os.environ.get("ML_LIVE_WINDOW", 60))), Broadcaster())
+
+# Forests of predictors whose data grew get new trees on recent rows every
+# ML_REFRESH_INTERVAL seconds (default daily, 0 turns it off), see refresh.py
+refresher = ForestRefresher(
+    services, float(os.environ.get("ML_REFRESH_INTERVAL", 86400)), on_swap=lambda name: forecast_cache.invalidate()
+)
+
+@asynccontextmanager
+async def lifespan(app):
+    # Warm everything in the background; requests are served meanwhile
+    if os.environ.get("ML_WARMUP", "1") != "0":
+        services.start_warm_up()
+    live.start_replay(lambda: services.store, float(os.environ.get("ML_LIVE_REPLAY_SPEED", 0)))
+    refresher.start()
+    yield
+    live.start_replay(None, 0)
+    # Off the event loop: stop() waits for a refresh that is still swapping models
+    await asyncio.to_thread(refresher.stop)
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Allow React frontend
 app.add_middleware(
@@ -21,54 +76,91 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if metrics.ENABLED:
+    @app.middleware("http")
+    async def time_requests(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        # Label by route template, so query strings do not create new series
+        route = request.scope.get("route")
+        metrics.observe(route.path if route else "unmatched", time.perf_counter() - start, metrics.REQUESTS)
+        return response
+
+@app.get("/metrics")
+def get_metrics():
+    """Stage and request latency histograms in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # @app.get("/")
 # def read_root():
 #     return {"message": "Hello World"}
 
-# Load dataset once
-print("Loading data... This may take a few seconds.")
-data_file = os.path.join(os.path.dirname(__file__), "household_power_cleaned.xlsx")
-df = load_data(data_file)
-print("Data loaded successfully!")
+# Forecast responses, keyed by (name, model version, origin, horizon)
+forecast_cache = ForecastCache(maxsize=256)
 
-# Get 7-day forecast from last available date
-predictor = EnergyPredictor(df)
-forecast_data = predictor.predict_next_7_days()
-print(forecast_data['forecast'])
+# Heavy work runs off the event loop: forest inference and pandas slicing get
+# their own pools, each refusing work (503) once max_pending jobs are queued.
+# Threads rather than processes: tree predict releases the GIL, and the
+# models and data already live (memory-mapped) in this process.
+max_pending = int(os.environ.get("ML_MAX_PENDING", 64))
+inference_pool = BoundedExecutor(
+    "inference", int(os.environ.get("ML_INFERENCE_WORKERS", os.cpu_count() or 1)), max_pending
+)
+pandas_pool = BoundedExecutor("pandas", int(os.environ.get("ML_PANDAS_WORKERS", 4)), max_pending)
+inflight = Coalescer()
+
+@app.exception_handler(Overloaded)
+async def overloaded(request, exc):
+    return JSONResponse(status_code=503, content={"error": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(serialize.NotAcceptable)
+async def not_acceptable(request, exc):
+    return JSONResponse(status_code=406, content={"error": str(exc)})
 
-# Get 24 hours forecast from last available date
-hourly_predictor = HourlyEnergyPredictor(df)
-forecast_24h = hourly_predictor.predict_next_24_hours()
-print(forecast_24h['forecast'])
+def respond(result):
+    """Encoded payloads are sent as they are, anything else as FastAPI's JSON."""
+    if isinstance(result, serialize.Payload):
+        return Response(content=result.body, media_type=result.media_type, headers={"Vary": "Accept"})
+    return result
+
+async def cached_forecast(key, compute):
+    """Forecast for key from the cache; concurrent misses share one computation."""
+    cached = forecast_cache.get(key)
+    if cached is not None:
+        return cached
+    return await inflight.run(key, lambda: inference_pool.run(forecast_cache.get_or_compute, key, compute))
 
-# 24 hours efficiency forecast
-hourly_eff = EfficiencyForecast24H(df)
-forecast_24h = hourly_eff.predict_next_24_hours
-print(forecast_24h)
+async def component(name):
+    """A service component; a cold one is built on the inference pool, off the event loop."""
+    if services.is_warm(name):
+        return services.get(name)
+    return await inference_pool.run(services.get, name)
 
-# 7 days efficiency forecast
-daily_eff = EfficiencyForecast7D(df)
-forecast_7d = daily_eff.predict_next_7_days()
-print(forecast_7d)
+@app.get("/ready")
+def get_ready():
+    """Which components are built; analytics routes only need "data"."""
+    components = services.status()
+    return {"ready": all(state == "warm" for state in components.values()), "components": components}
 
 
 @app.get("/compare_weeks")
-def compare_weeks(start: str):
+async def compare_weeks(start: str):
+    return await pandas_pool.run(_compare_weeks, start)
+
+def _compare_weeks(start):
   
     # Convert strings to datetime
     start_date = datetime.fromisoformat(start)
     end_date = start_date + timedelta(days=6) 
     delta = end_date - start_date
 
-    # This week
-    this_week_df = df.loc[start_date:end_date]  # use .loc for datetime slicing
-    this_week_data = aggregate_week(this_week_df)
+    # This week (inclusive end, same window as df.loc[start_date:end_date])
+    this_week_data = aggregate_week(services.rollup, start_date, end_date)
 
     # Last week (same number of days before this week start)
     last_week_start = start_date - (delta + timedelta(days=1))
     last_week_end = start_date - timedelta(days=1)
-    last_week_df = df.loc[last_week_start:last_week_end]
-    last_week_data = aggregate_week(last_week_df)
+    last_week_data = aggregate_week(services.rollup, last_week_start, last_week_end)
 
     # Difference (this week - last week)
     diff = {k + "_diff": this_week_data[k] - last_week_data[k] for k in this_week_data}
@@ -80,27 +172,147 @@ def compare_weeks(start: str):
     }
 
 @app.get("/get_energy_performance")
-def get_energy_performance(start_date: str):
+async def get_energy_performance(request: Request, start_date: str, format: str = None):
+    fmt = serialize.negotiate(request.headers.get("accept"), format)
+    return respond(await pandas_pool.run(_energy_performance, start_date, fmt))
+
+def _energy_performance(start_date, fmt="records"):
     
     start = datetime.fromisoformat(start_date)
     end = start + timedelta(days=7)  # add full 7 days
-    week_df = df.loc[start:end - timedelta(seconds=1)] 
+    daily_sums, _ = services.rollup.buckets(start, end - timedelta(seconds=1), freq='D')
 
-    daily_summary = (
-        week_df.groupby(week_df.index.date)[['Sub_metering_1','Sub_metering_2','Sub_metering_3']]
-        .sum()
-        .reset_index()
-    )
+    daily_summary = daily_sums[['Sub_metering_1','Sub_metering_2','Sub_metering_3']].copy()
+    if fmt != "records":
+        with timed(f"serialize.{fmt}"):
+            return serialize.encode(daily_summary, fmt)
+    daily_summary['date'] = daily_sums.index.strftime('%Y-%m-%d')
 
-    daily_summary['date'] = daily_summary['index'].astype(str)
-    daily_summary = daily_summary.drop(columns=['index'])
+    with timed("serialize.records"):
+        result = daily_summary.to_dict(orient='records')
+    return result
 
-    result = daily_summary.to_dict(orient='records')
+@app.get("/aggregate")
+async def get_aggregate(
+    request: Request, start: str = None, end: str = None, granularity: str = None,
+    columns: str = Query("energy_kwh,active_power_kw,power_factor", alias="metrics"), max_points: int = 1000,
+    downsample: str = "lttb", format: str = None,
+):
+    # Read into columns: a parameter named metrics would shadow the metrics module
+    fmt = serialize.negotiate(request.headers.get("accept"), format)
+    if fmt == "arrow":
+        raise serialize.NotAcceptable("/aggregate series have their own timestamps, use records or columns")
+    return respond(await pandas_pool.run(_aggregate, start, end, granularity, columns, max_points, downsample, fmt))
+
+def _parse_bound(value, default, end=False):
+    """Timestamp of an ISO start or end parameter; raises ValueError for an invalid or timezone-aware one."""
+    if value is None:
+        return default
+    bound = pd.Timestamp(datetime.fromisoformat(value))
+    if bound.tzinfo is not None:
+        raise ValueError(f"{value!r} has a timezone, expected a local time")
+    # A bare end date covers that whole day
+    if end and len(value) == 10:
+        bound += pd.Timedelta(days=1) - pd.Timedelta(1, unit="ns")
+    return bound
+
+def _aggregate(start, end, granularity, columns, max_points, downsample, fmt="records"):
+    """
+    Metrics per bucket over [start, end] (inclusive; default: the minute
+    window) as one {"time", "value"} series per metric. History outside the
+    window is answered per hour or coarser, and minute granularity is
+    refused for a range reaching beyond it. Without a granularity, the
+    finest one with at most max_points buckets is used; a series longer than
+    max_points is downsampled ("lttb" keeps the shape, "minmax" the extremes).
+    The columns format sends {"t", "value"} arrays with epoch ms timestamps.
+
+    columns: comma-separated METRICS names (the metrics query parameter)
+    """
+    names = [name for name in columns.split(",") if name]
+    unknown = [name for name in names if name not in METRICS]
+    if not names or unknown:
+        return {"error": f"Unknown metrics {unknown}, expected some of {list(METRICS)}"}
+    if granularity is not None and granularity not in GRANULARITIES:
+        return {"error": f"Unknown granularity {granularity!r}, expected one of {list(GRANULARITIES)}"}
+    if downsample not in DOWNSAMPLERS:
+        return {"error": f"Unknown downsampling {downsample!r}, expected one of {list(DOWNSAMPLERS)}"}
+    if max_points < 3:
+        return {"error": "max_points must be at least 3."}
+
+    rollup = services.rollup
+    if not len(rollup):
+        return {"error": "No data available."}
+    index = rollup.index
+    try:
+        start = _parse_bound(start, pd.Timestamp(index[0]))
+        end = _parse_bound(end, pd.Timestamp(index[-1]), end=True)
+    except ValueError as e:
+        return {"error": f"Invalid start or end: {e}"}
+    # Hours outside the minute window come from the hourly history rollups
+    outside = beyond(rollup, start, end)
+    if granularity is None:
+        granularity = pick_granularity(start, end, max_points)
+        if outside and granularity == "minute":
+            granularity = "hour"
+    elif outside and granularity == "minute":
+        return {
+            "error": f"Minute data covers {pd.Timestamp(index[0])} to {pd.Timestamp(index[-1])}, "
+                     "use hour granularity or coarser beyond it"
+        }
+    history = services.history if outside and granularity != "minute" else None
+    frame = aggregate(rollup, start, end, granularity, names, history)
+
+    times = frame.index.as_unit("ns").asi8
+    series = {}
+    downsampled = False
+    with timed("aggregate.downsample"):
+        for name in names:
+            values = frame[name].to_numpy(dtype="float64")
+            keep = ~np.isnan(values)
+            t, v = times[keep], values[keep]
+            if len(v) > max_points:
+                picked = DOWNSAMPLERS[downsample](t, v, max_points)
+                t, v = t[picked], v[picked]
+                downsampled = True
+            if fmt == "columns":
+                series[name] = {"t": t // 10**6, "value": v}
+            else:
+                series[name] = {
+                    "time": pd.DatetimeIndex(t).strftime("%Y-%m-%dT%H:%M:%S").tolist(),
+                    "value": v.tolist(),
+                }
+
+    result = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "granularity": granularity,
+        "buckets": len(frame),
+        "downsample": downsample if downsampled else None,
+        "series": series,
+    }
+    if fmt == "columns":
+        with timed("serialize.columns"):
+            return serialize.Payload(serialize.dumps(result), serialize.COLUMNS_TYPE)
     return result
 
 @app.get("/predict_next_7_days")
-def get_forecast(start_date: str = None):
-    forecast_df = predictor.predict_next_7_days(start_date)
+async def get_forecast(start_date: str = None, intervals: bool = False):
+    """intervals=true adds p10/p50/p90 per day, from the spread of the forest's trees."""
+    predictor = await component("predictor")
+    # The generation is read before the data, so ingestion in between cannot file a stale forecast under it
+    generation = forecast_cache.generation
+    try:
+        key = (generation, "predict_next_7_days", predictor.model_version, predictor.origin(start_date), 7, intervals)
+    except ValueError as e:
+        return {"error": str(e)}
+    return await cached_forecast(key, lambda: _forecast_7_days(predictor, start_date, intervals))
+
+def _forecast_7_days(predictor, start_date, intervals=False):
+    # The instance whose model_version is in the cache key, even if a refresh swapped it since
+    try:
+        forecast_df = predictor.predict_next_7_days(start_date, intervals)
+    except ValueError as e:
+        return {"error": str(e)}
 
     # If the predictor already produced a list/dict → return directly
     if isinstance(forecast_df, (list, dict)):
@@ -117,10 +329,46 @@ def get_forecast(start_date: str = None):
 
     return response
 
+class BatchForecastRequest(BaseModel):
+    start_dates: list[str] = Field(min_length=1)
+
+@app.post("/predict_next_7_days/batch")
+async def get_forecast_batch(request: BatchForecastRequest):
+    return await inference_pool.run(_forecast_batch, request.start_dates)
+
+def _forecast_batch(start_dates):
+    # All origins share one recursive pass: 7 model.predict calls in total
+    try:
+        forecasts = services.get("predictor").predict_next_7_days_batch(start_dates)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    return [
+        {
+            "start_date": start_date,
+            "forecast": [
+                {"date": date.strftime("%Y-%m-%d"), "predicted_kWh": float(kwh)}
+                for date, kwh in zip(forecast_df['Date'], forecast_df['Predicted_Daily_Energy_kWh'])
+            ]
+        }
+        for start_date, forecast_df in zip(start_dates, forecasts)
+    ]
+
 @app.get("/predict_next_24_hours")
-def get_hourly_forecast():
-    forecast_data = hourly_predictor.predict_next_24_hours()
-    forecast_list = forecast_data['forecast'].to_dict(orient='records')
+async def get_hourly_forecast(intervals: bool = False):
+    """intervals=true adds p10/p50/p90 per hour, from the spread of the forest's trees."""
+    hourly_predictor = await component("hourly_predictor")
+    generation = forecast_cache.generation
+    key = (generation, "predict_next_24_hours", hourly_predictor.model_version, hourly_predictor.hourly_df.index[-1], 24, intervals)
+    return await cached_forecast(key, lambda: _forecast_24_hours(hourly_predictor, intervals))
+
+def _forecast_24_hours(hourly_predictor, intervals=False):
+    try:
+        forecast_data = hourly_predictor.predict_next_24_hours(intervals)
+    except ValueError as e:
+        return {"error": str(e)}
+    with timed("serialize.records"):
+        forecast_list = forecast_data['forecast'].to_dict(orient='records')
     return {
         "forecast": forecast_list,
         "lowest_hour": forecast_data['lowest_hour'].to_dict(),
@@ -128,18 +376,178 @@ def get_hourly_forecast():
     }
 
 @app.get("/efficiency_24_hours")
-def get_eff_24h():
+async def get_eff_24h(request: Request, format: str = None):
+    fmt = serialize.negotiate(request.headers.get("accept"), format)
+    hourly_eff = await component("hourly_eff")
+    # Cached per format, so hits skip the encoding too
+    generation = forecast_cache.generation
+    key = (generation, "efficiency_24_hours", hourly_eff.model_version, hourly_eff.feature_df.index[-1], 24, fmt)
+    return respond(await cached_forecast(key, lambda: _eff_24h(hourly_eff, fmt)))
+
+def _eff_24h(hourly_eff, fmt="records"):
     forecast = hourly_eff.predict_next_24_hours()
-    return forecast.reset_index().rename(columns={"index": "datetime"}).to_dict(orient="records")
+    with timed(f"serialize.{fmt}"):
+        if fmt != "records":
+            return serialize.encode(forecast, fmt)
+        return forecast.reset_index().rename(columns={"index": "datetime"}).to_dict(orient="records")
 
 
 @app.get("/efficiency_7_days")
-def get_eff_7days():
+async def get_eff_7days(request: Request, format: str = None):
+    fmt = serialize.negotiate(request.headers.get("accept"), format)
+    daily_eff = await component("daily_eff")
+    generation = forecast_cache.generation
+    key = (generation, "efficiency_7_days", daily_eff.model_version, daily_eff.daily.index[-1], 7, fmt)
+    return respond(await cached_forecast(key, lambda: _eff_7days(daily_eff, fmt)))
+
+def _eff_7days(daily_eff, fmt="records"):
     forecast = daily_eff.predict_next_7_days()
-    return forecast.reset_index().rename(columns={"index": "date"}).to_dict(orient="records")
+    with timed(f"serialize.{fmt}"):
+        if fmt != "records":
+            return serialize.encode(forecast, fmt)
+        return forecast.reset_index().rename(columns={"index": "date"}).to_dict(orient="records")
+
+class Reading(BaseModel):
+    datetime: str
+    Global_active_power: Optional[float] = None
+    Global_reactive_power: Optional[float] = None
+    Voltage: Optional[float] = None
+    Global_intensity: Optional[float] = None
+    Sub_metering_1: Optional[float] = None
+    Sub_metering_2: Optional[float] = None
+    Sub_metering_3: Optional[float] = None
+
+# Readings per /ingest request; a longer backfill is posted in several
+MAX_INGEST_READINGS = int(os.environ.get("ML_MAX_INGEST_READINGS", 10080))
+
+class IngestRequest(BaseModel):
+    readings: list[Reading] = Field(max_length=MAX_INGEST_READINGS)
+
+@app.post("/ingest")
+async def ingest(request: IngestRequest):
+    """
+    Append new minute readings (raw units, sub-meters in Wh) to the live data.
+
+    Only the hourly/daily buckets the readings fall into are re-aggregated,
+    and only those rows get new lag features.
+    """
+    readings = [r.model_dump() for r in request.readings]
+    result = await pandas_pool.run(_ingest, readings)
+    # The replay is the stream's producer while it runs; only the fan-out stays on the event loop
+    if result.get("ingested") and len(live.broadcaster) and not live.replaying:
+        live.send(await pandas_pool.run(_live_messages, readings))
+    return result
+
+def _live_messages(readings):
+    return live.encode(readings_to_frame(readings, LIVE_CHANNELS), live.broadcaster.queue_size)
+
+def _ingest(readings):
+    store = services.store
+    if not readings:
+        return {"ingested": 0, "last_timestamp": str(store.df.index[-1])}
+
+    # Shared with the publication of built components, see Services
+    with services.lock:
+        last = store.df.index[-1]
+        try:
+            new_df = readings_to_frame(readings, store.df.columns)
+        except ValueError as e:
+            return {"error": str(e)}
+        if new_df.index.has_duplicates or new_df.index[0] <= last:
+            return {"error": f"readings must be unique and newer than {last}"}
+
+        since = store.append(new_df)
+        services.rollup.extend(new_df)
+        for model in services.warm_predictors():
+            model.update(since)
+        forecast_cache.invalidate()
+
+    return {"ingested": len(new_df), "last_timestamp": str(store.df.index[-1])}
+
+@app.post("/models/refresh")
+async def refresh_models(force: bool = False):
+    """
+    Refresh the forests of the warm predictors now, instead of waiting for
+    the scheduler: {component: {"models", "trees", "rows", "seconds",
+    "model_version"}} for each one refreshed.
+    """
+    return await inference_pool.run(refresher.refresh_all, force)
+
+@app.get("/submeter_forecast")
+async def get_submeter_forecast():
+    submeter = await component("submeter")
+    generation = forecast_cache.generation
+    key = (generation, "submeter_forecast", submeter.model_version, submeter.daily.index[-1], submeter.HORIZON)
+    return await cached_forecast(key, lambda: _submeter_forecast(submeter))
+
+def _submeter_forecast(submeter):
+    results = submeter.results()
+    with timed("serialize.records"):
+        daily = results["daily"].rename_axis("date").reset_index()
+        daily["date"] = daily["date"].dt.strftime("%Y-%m-%d")
+        hourly = results["hourly"].rename_axis("datetime").reset_index()
+        hourly.insert(1, "hour", hourly["datetime"].dt.hour)
+        return {
+            "daily_forecast": daily.to_dict(orient="records"),
+            "hourly_forecast": hourly.to_dict(orient="records"),
+            "submeters": results["summary"],
+        }
+
+@app.get("/live/stream")
+async def live_stream():
+    """
+    Server-sent events, one per minute reading: {"time", "values", "window"
+    (rolling mean/min/max per channel), "today_kwh", "alerts"}.
+    """
+    queue = live.broadcaster.subscribe()
+
+    async def events():
+        try:
+            if live.latest:
+                yield f"data: {live.latest}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            live.broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.websocket("/live/ws")
+async def live_ws(websocket: WebSocket):
+    """The /live/stream messages over a WebSocket."""
+    await websocket.accept()
+    queue = live.broadcaster.subscribe()
+    try:
+        if live.latest:
+            await websocket.send_text(live.latest)
+        while True:
+            await websocket.send_text(await queue.get())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        live.broadcaster.unsubscribe(queue)
+
+@app.post("/live/replay")
+async def live_replay(speed: float, start: str = None):
+    """Replay the stored minutes at speed minutes per second from start (speed=0 stops)."""
+    live.start_replay(lambda: services.store, speed, start)
+    return {"replaying": live.replaying, "speed": speed, "subscribers": len(live.broadcaster)}
+
+@app.get("/forecast_cache/stats")
+def get_forecast_cache_stats():
+    return forecast_cache.stats()
 
 @app.get("/get_month_average")
-def get_month_average(start_date: str):
+async def get_month_average(start_date: str):
+    return await pandas_pool.run(_month_average, start_date)
+
+def _month_average(start_date):
     try:
         # Parse input
         start = datetime.fromisoformat(start_date)
@@ -150,15 +558,15 @@ def get_month_average(start_date: str):
         month_start = datetime(year, month, 1)
         month_end = datetime(year, month, monthrange(year, month)[1], 23, 59, 59)
 
-        # Slice data for the entire month
-        month_df = df.loc[month_start:month_end]
-
-        if month_df.empty:
+        # Totals for the entire month
+        rollup = services.rollup
+        if rollup.rows(month_start, month_end) == 0:
             return {"error": "No data available for this month."}
+        month_sums, _ = rollup.totals(month_start, month_end)
 
         # Total energy in kWh (dataset is 1-min interval)
-        total_kwh = month_df["Global_active_power"].sum() / 60
-        sub_meter_total = month_df['Sub_metering_1'].sum() + month_df['Sub_metering_2'].sum() + month_df['Sub_metering_3'].sum()
+        total_kwh = month_sums["Global_active_power"] / 60
+        sub_meter_total = month_sums['Sub_metering_1'] + month_sums['Sub_metering_2'] + month_sums['Sub_metering_3']
 
         days = monthrange(year, month)[1]
 
@@ -178,3 +586,75 @@ def get_month_average(start_date: str):
         return {"error": str(e)}
 
 
+
+
+# /dashboard widgets. Forecasts go through the forecast cache and run
+# concurrently; the analytics are rollup lookups, computed together in one
+# pandas-pool job.
+FORECAST_WIDGETS = {
+    "predict_next_7_days": lambda request, params: get_forecast(params["start_date"]),
+    "predict_next_24_hours": lambda request, params: get_hourly_forecast(),
+    "efficiency_7_days": lambda request, params: get_eff_7days(request, "records"),
+    "efficiency_24_hours": lambda request, params: get_eff_24h(request, "records"),
+    "submeter_forecast": lambda request, params: get_submeter_forecast(),
+}
+ANALYTICS_WIDGETS = {
+    "compare_weeks": lambda params: _compare_weeks(params["week_start"]),
+    "energy_performance": lambda params: _energy_performance(params["week_start"]),
+    "month_average": lambda params: _month_average(params["month_start"]),
+}
+# The Forecast page
+DASHBOARD_WIDGETS = "predict_next_7_days,predict_next_24_hours,efficiency_7_days,efficiency_24_hours,month_average"
+
+@app.get("/dashboard")
+async def get_dashboard(
+    request: Request, widgets: str = DASHBOARD_WIDGETS,
+    start_date: str = None, week_start: str = None, month_start: str = None,
+):
+    """
+    Several widgets in one request, as {widget: the response of its own endpoint}.
+
+    start_date is passed to predict_next_7_days, week_start to compare_weeks
+    and energy_performance (default: the last 7 days of data) and
+    month_start to month_average (default: the last month of data). A
+    widget that fails reports {"error": ...} without failing the others.
+    """
+    names = [name for name in widgets.split(",") if name]
+    unknown = [name for name in names if name not in FORECAST_WIDGETS and name not in ANALYTICS_WIDGETS]
+    if unknown:
+        return {"error": f"Unknown widgets {unknown}, expected some of {list(FORECAST_WIDGETS) + list(ANALYTICS_WIDGETS)}"}
+
+    params = {"start_date": start_date, "week_start": week_start, "month_start": month_start}
+    forecasts = [name for name in names if name in FORECAST_WIDGETS]
+    analytics = [name for name in names if name in ANALYTICS_WIDGETS]
+
+    jobs = [FORECAST_WIDGETS[name](request, params) for name in forecasts]
+    if analytics:
+        jobs.append(pandas_pool.run(_dashboard_analytics, analytics, params))
+    results = await asyncio.gather(*jobs, return_exceptions=True)
+
+    response = {}
+    for name, result in zip(forecasts, results):
+        if isinstance(result, Overloaded):
+            raise result
+        response[name] = {"error": str(result)} if isinstance(result, Exception) else result
+    if analytics:
+        if isinstance(results[-1], BaseException):
+            raise results[-1]
+        response.update(results[-1])
+    return {name: response[name] for name in names}
+
+def _dashboard_analytics(names, params):
+    last_day = pd.Timestamp(services.rollup.index[-1]).normalize()
+    params = {
+        **params,
+        "week_start": params["week_start"] or (last_day - pd.Timedelta(days=6)).date().isoformat(),
+        "month_start": params["month_start"] or last_day.replace(day=1).date().isoformat(),
+    }
+    results = {}
+    for name in names:
+        try:
+            results[name] = ANALYTICS_WIDGETS[name](params)
+        except Exception as e:
+            results[name] = {"error": str(e)}
+    return results
@@ -0,0 +1,67 @@
+"""
+Diff two benchmark result files.
+
+    python -m benchmarks.compare old.json new.json [--threshold 0.1]
+
+Every timing present in both files is listed with its ratio new/old;
+slowdowns beyond the threshold are marked.
+"""
+import argparse
+import json
+
+# Leaves that are timings, where smaller is better
+TIMING_SUFFIXES = ("_s", "_ms")
+
+
+def flatten(tree, prefix=""):
+    flat = {}
+    for key, value in tree.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def is_timing(name):
+    # micro results are plain seconds keyed by step name, plus the row count
+    if name.startswith("micro."):
+        return name != "micro.rows"
+    return name.endswith(TIMING_SUFFIXES)
+
+
+def compare(old, new, threshold=0.1):
+    old_flat = flatten({k: v for k, v in old.items() if k in ("micro", "load")})
+    new_flat = flatten({k: v for k, v in new.items() if k in ("micro", "load")})
+    rows = []
+    for name in sorted(old_flat.keys() & new_flat.keys()):
+        if not is_timing(name) or not old_flat[name]:
+            continue
+        ratio = new_flat[name] / old_flat[name]
+        rows.append((name, old_flat[name], new_flat[name], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown to flag")
+    args = parser.parse_args(argv)
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f"{old['environment'].get('commit')} -> {new['environment'].get('commit')}")
+    rows = compare(old, new, args.threshold)
+    for name, before, after, ratio, slower in rows:
+        flag = "  SLOWER" if slower else ""
+        print(f"{name:>64}: {before:12.4f} -> {after:12.4f}  x{ratio:5.2f}{flag}")
+    print(f"{sum(r[4] for r in rows)} of {len(rows)} timings slower by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Estimator backends compared on fit time, model size, latency and accuracy.
+
+    cd ML
+    python -m benchmarks.estimators [--data FILE] [--backends forest compiled ...]
+                                    [--mae-budget 0.02] [--out results.json]
+
+Each backend in estimators.BACKENDS is fitted for EnergyPredictor and
+HourlyEnergyPredictor on their usual holdout split. Reports the fit time,
+the pickled model size, single-row predict latency, the latency of a whole
+forecast and the holdout MAE. With --mae-budget (relative, 0.02 = 2%) the
+fastest backend whose MAE is within the budget of the default forest's is
+recommended per predictor.
+"""
+import argparse
+import io
+import json
+import os
+import time
+
+import joblib
+
+from estimators import BACKENDS
+from loader import load_data
+from predictor import EnergyPredictor, HourlyEnergyPredictor
+from store import TimeSeriesStore
+
+from benchmarks.timing import best_of
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def model_bytes(model):
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell()
+
+
+def measure(cls, store, backend, forecast, repeat=5):
+    predictor = cls(store, train=False, backend=backend)
+    start = time.perf_counter()
+    predictor._train_model()
+    fit_s = time.perf_counter() - start
+
+    row = predictor.training_frame()[predictor.feature_names].to_numpy()[-1:]
+    return {
+        "fit_s": fit_s,
+        "model_bytes": model_bytes(predictor.model),
+        "predict_one_ms": best_of(repeat, lambda: predictor.model.predict(row)) * 1000,
+        "forecast_ms": best_of(repeat, lambda: forecast(predictor)) * 1000,
+        "mae": float(predictor.holdout_mae),
+    }
+
+
+def recommend(results, budget):
+    """The backend with the fastest forecast whose MAE is within budget of the default forest."""
+    limit = results["forest"]["mae"] * (1 + budget)
+    eligible = [backend for backend, r in results.items() if r["mae"] <= limit]
+    return min(eligible, key=lambda backend: results[backend]["forecast_ms"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(HERE), "household_power_cleaned.xlsx"))
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mae-budget", type=float, help="relative MAE increase allowed over the default forest")
+    parser.add_argument("--out", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    backends = args.backends if "forest" in args.backends else ["forest"] + args.backends
+    store = TimeSeriesStore(load_data(args.data))
+    cases = (
+        (EnergyPredictor, lambda p: p.predict_next_7_days()),
+        (HourlyEnergyPredictor, lambda p: p.predict_next_24_hours()),
+    )
+
+    results = {}
+    for cls, forecast in cases:
+        results[cls.__name__] = res = {backend: measure(cls, store, backend, forecast, args.repeat) for backend in backends}
+        print(cls.__name__)
+        for backend, r in res.items():
+            print(
+                f"  {backend:>14}: MAE {r['mae']:.4f}  fit {r['fit_s']:.1f}s  size {r['model_bytes'] / 1e6:.1f} MB"
+                f"  predict one {r['predict_one_ms']:.2f} ms  forecast {r['forecast_ms']:.1f} ms"
+            )
+        if args.mae_budget is not None:
+            res["recommended"] = recommend(res, args.mae_budget)
+            print(f"  fastest within {args.mae_budget:.0%} of the forest's MAE: {res['recommended']}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
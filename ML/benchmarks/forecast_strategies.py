@@ -0,0 +1,135 @@
+"""
+Recursive vs direct forecasting: accuracy and latency on a holdout.
+
+    cd ML
+    python -m benchmarks.forecast_strategies [--data FILE] [--out results.json]
+
+For HourlyEnergyPredictor and EfficiencyForecast7D, both strategies are
+fitted on the first 80% of the feature rows and forecast from every later
+origin whose whole horizon is observed. Reports MAE (overall, first and
+last step) and the latency of one forecast and of all origins at once.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from predictor import HourlyEnergyPredictor, hourly_calendar
+from efficiency_predictor import DAILY_FEATURES, DAILY_LAGS, EfficiencyForecast7D, clip_unit, daily_efficiency_calendar
+from forecaster import DirectForecaster, RecursiveForecaster, direct_targets
+from loader import load_data
+from store import TimeSeriesStore
+
+from benchmarks.timing import best_of
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def hourly_case(store):
+    p = HourlyEnergyPredictor(store, train=False)
+    frame = p.hourly_df
+    target = frame["Hourly_energy_kWh"]
+    step = pd.Timedelta(hours=1)
+
+    def origins(rows):
+        # Forecast from row T starts at T+1 with y_T as the newest lag
+        lags = np.column_stack([rows["Hourly_energy_kWh"]] + [rows[name] for name in p.LAGS[:-1]])
+        times = rows.index.values[:, None] + np.arange(1, p.HORIZON + 1) * step.to_timedelta64()
+        return lags, times
+
+    return {
+        "name": "HourlyEnergyPredictor", "frame": frame, "target": target, "horizon": p.HORIZON, "step": step,
+        "features": p.feature_names, "lags": p.LAGS, "calendar": hourly_calendar, "params": p.PARAMS,
+        "postprocess": None, "origins": origins, "first_target": 1,
+    }
+
+
+def daily_eff_case(store):
+    p = EfficiencyForecast7D(store, train=False)
+    frame = p.daily
+    step = pd.Timedelta(days=1)
+
+    def origins(rows):
+        # The first step reuses row T's own features, as predict_next_7_days does
+        lags = rows[DAILY_LAGS].to_numpy()
+        times = rows.index.values[:, None] + np.arange(p.HORIZON) * step.to_timedelta64()
+        return lags, times
+
+    return {
+        "name": "EfficiencyForecast7D", "frame": frame, "target": frame["p_factor"], "horizon": p.HORIZON,
+        "step": step, "features": DAILY_FEATURES, "lags": DAILY_LAGS, "calendar": daily_efficiency_calendar,
+        "params": p.PARAMS, "postprocess": clip_unit, "origins": origins, "first_target": 0,
+    }
+
+
+def compare(case, repeat=3):
+    frame, target, horizon, step = case["frame"], case["target"], case["horizon"], case["step"]
+    X = frame[case["features"]]
+    split = int(len(frame) * 0.8)
+
+    # Actual values over each origin's horizon, starting first_target steps ahead
+    actual = direct_targets(target, horizon + case["first_target"], step).iloc[:, case["first_target"]:]
+    test = frame.iloc[split:][actual.iloc[split:].notna().all(axis=1).to_numpy()]
+    lags, times = case["origins"](test)
+    truth = actual.loc[test.index].to_numpy()
+
+    models = {}
+    fit_times = {}
+    start = time.perf_counter()
+    models["recursive"] = RandomForestRegressor(**case["params"]).fit(X.iloc[:split].to_numpy(), target.iloc[:split].to_numpy())
+    fit_times["recursive"] = time.perf_counter() - start
+
+    Y = direct_targets(target.iloc[:split], horizon, step)
+    complete = Y.notna().all(axis=1).to_numpy()
+    start = time.perf_counter()
+    models["direct"] = RandomForestRegressor(**case["params"]).fit(X.iloc[:split].to_numpy()[complete], Y.to_numpy()[complete])
+    fit_times["direct"] = time.perf_counter() - start
+
+    results = {"origins": len(test), "train_rows": split}
+    for strategy, engine_cls in (("recursive", RecursiveForecaster), ("direct", DirectForecaster)):
+        engine = engine_cls([models[strategy]], case["features"], case["lags"], case["calendar"], case["postprocess"])
+        pred = engine.forecast_batch(lags, times)[:, :, 0]
+        errors = np.abs(pred - truth)
+        results[strategy] = {
+            "mae": float(errors.mean()),
+            "mae_first_step": float(errors[:, 0].mean()),
+            "mae_last_step": float(errors[:, -1].mean()),
+            "fit_s": fit_times[strategy],
+            "forecast_one_s": best_of(repeat, lambda: engine.forecast(lags[-1], times[-1])),
+            "forecast_all_s": best_of(repeat, lambda: engine.forecast_batch(lags, times)),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(HERE), "household_power_cleaned.xlsx"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    store = TimeSeriesStore(load_data(args.data))
+    results = {}
+    for make_case in (hourly_case, daily_eff_case):
+        case = make_case(store)
+        results[case["name"]] = res = compare(case, args.repeat)
+        print(f"{case['name']} ({res['origins']} holdout origins, {case['horizon']} steps)")
+        for strategy in ("recursive", "direct"):
+            r = res[strategy]
+            print(
+                f"  {strategy:>9}: MAE {r['mae']:.4f} (step 1 {r['mae_first_step']:.4f}, last {r['mae_last_step']:.4f})"
+                f"  fit {r['fit_s']:.1f}s  one forecast {r['forecast_one_s'] * 1000:.1f} ms"
+                f"  all origins {r['forecast_all_s'] * 1000:.1f} ms"
+            )
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+In-process HTTP load test of app.py through FastAPI's TestClient.
+
+app.py reads ML_DATA_FILE and ML_MODELS_DIR at import, so they are set
+before the import; the components are then warmed up before the timed run. Requests are spread over
+`concurrency` threads, each with its own client, and per-endpoint latency
+percentiles are reported in milliseconds.
+"""
+import importlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+def load_app(data_file, models_dir):
+    os.environ["ML_DATA_FILE"] = data_file
+    os.environ["ML_MODELS_DIR"] = models_dir
+    if "app" in sys.modules:
+        return importlib.reload(sys.modules["app"])
+    return importlib.import_module("app")
+
+
+def request_mix(app_module, origins=30):
+    """(name, url) pairs covering the analytics and forecast endpoints."""
+    index = app_module.services.store.df.index
+    first, last = index[0].normalize(), index[-1].normalize()
+    week = (first + pd.Timedelta(days=7)).strftime("%Y-%m-%d")
+    mid = (first + (last - first) / 2).normalize().strftime("%Y-%m-%d")
+    days = app_module.services.get("predictor").daily_df.index[-origins:].strftime("%Y-%m-%d")
+
+    mix = [
+        ("compare_weeks", f"/compare_weeks?start={week}"),
+        ("get_energy_performance", f"/get_energy_performance?start_date={week}"),
+        ("get_month_average", f"/get_month_average?start_date={mid}"),
+        ("predict_next_24_hours", "/predict_next_24_hours"),
+        ("efficiency_24_hours", "/efficiency_24_hours"),
+        ("efficiency_7_days", "/efficiency_7_days"),
+    ]
+    # Distinct origins, so part of the 7-day traffic misses the forecast cache
+    mix += [("predict_next_7_days", f"/predict_next_7_days?start_date={day}") for day in days]
+    return mix
+
+
+def summarize(latencies):
+    ms = np.asarray(latencies) * 1000
+    return {
+        "count": len(ms),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def run(data_file, models_dir, requests=500, concurrency=8):
+    from fastapi.testclient import TestClient
+
+    start = time.perf_counter()
+    app_module = load_app(data_file, models_dir)
+    startup = time.perf_counter() - start
+
+    # TestClient is used without its lifespan, so warm up explicitly
+    start = time.perf_counter()
+    app_module.services.warm_up()
+    warmup = time.perf_counter() - start
+
+    mix = request_mix(app_module)
+    schedule = [mix[i % len(mix)] for i in range(requests)]
+    latencies = {}
+    errors = []
+    lock = threading.Lock()
+    local = threading.local()
+
+    def send(item):
+        name, url = item
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = TestClient(app_module.app)
+
+        t0 = time.perf_counter()
+        response = client.get(url)
+        elapsed = time.perf_counter() - t0
+
+        with lock:
+            latencies.setdefault(name, []).append(elapsed)
+            if response.status_code != 200 or (isinstance(response.json(), dict) and "error" in response.json()):
+                errors.append(f"{url}: {response.status_code}")
+
+    app_module.forecast_cache.invalidate()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, schedule))
+    wall = time.perf_counter() - wall_start
+
+    everything = [t for times in latencies.values() for t in times]
+    results = {
+        "startup_s": startup,
+        "warmup_s": warmup,
+        "requests": requests,
+        "concurrency": concurrency,
+        "wall_s": wall,
+        "throughput_rps": requests / wall,
+        "errors": len(errors),
+        "overall": summarize(everything),
+        "endpoints": {name: summarize(times) for name, times in sorted(latencies.items())},
+        "forecast_cache": app_module.forecast_cache.stats(),
+    }
+
+    for name, stats in results["endpoints"].items():
+        print(f"{name:>24}: p50 {stats['p50_ms']:8.1f} ms  p95 {stats['p95_ms']:8.1f} ms  ({stats['count']} requests)")
+    print(f"{requests} requests on {concurrency} threads in {wall:.2f}s ({results['throughput_rps']:.1f} req/s), {len(errors)} errors")
+    for error in errors[:5]:
+        print("  error:", error)
+    return results
@@ -0,0 +1,77 @@
+"""
+Micro-benchmarks of the data and model hot paths, one timing per step.
+
+Every step is timed as the best of `repeat` runs, except model fits, which
+run once. Results are seconds keyed by step name.
+"""
+import shutil
+
+import pandas as pd
+
+from predictor import EnergyPredictor, HourlyEnergyPredictor
+from efficiency_predictor import EfficiencyForecast24H, EfficiencyForecast7D
+from loader import _cache_dir, load_cached, load_data
+from processor import aggregate_week
+from rollup import RollupStore
+from store import TimeSeriesStore
+
+from benchmarks.timing import best_of
+
+PREDICTORS = [EnergyPredictor, HourlyEnergyPredictor, EfficiencyForecast24H, EfficiencyForecast7D]
+
+# Forecast entry points of each predictor class
+FORECASTS = {
+    "EnergyPredictor": ["predict_next_7_days"],
+    "HourlyEnergyPredictor": ["predict_next_24_hours"],
+    "EfficiencyForecast24H": ["predict_next_24_hours"],
+    "EfficiencyForecast7D": ["predict_next_7_days"],
+}
+
+
+def run(data_file, start=None, end=None, repeat=3, fit=True):
+    """
+    Time loading, aggregation, feature building, fitting and forecasting.
+
+    start/end select the load_data window (None keeps every row). With
+    fit=False the predictors are still built but not trained or forecast.
+    """
+    results = {}
+
+    def timed(name, func, times=repeat):
+        results[name] = best_of(times, func)
+        print(f"{name:>48}: {results[name] * 1000:10.1f} ms")
+
+    cache_dir = _cache_dir(data_file)
+    timed("load.parse_source", lambda: (shutil.rmtree(cache_dir, ignore_errors=True), load_cached(data_file)), 1)
+    timed("load.cached", lambda: load_cached(data_file))
+    timed("load.load_data", lambda: load_data(data_file, start, end))
+
+    df = load_data(data_file, start, end)
+    results["rows"] = len(df)
+
+    timed("store.build", lambda: TimeSeriesStore(df))
+    timed("store.hourly", lambda: TimeSeriesStore(df).hourly)
+    timed("store.daily", lambda: TimeSeriesStore(df).daily)
+    timed("rollup.build", lambda: RollupStore(df))
+
+    store = TimeSeriesStore(df)
+    rollup = RollupStore(store.df)
+    week_start = df.index[0].normalize() + pd.Timedelta(days=7)
+    timed("processor.aggregate_week", lambda: aggregate_week(rollup, week_start, week_start + pd.Timedelta(days=6)))
+
+    for cls in PREDICTORS:
+        name = cls.__name__
+        timed(f"{name}.prepare", lambda: cls(store, train=False))
+        if not fit:
+            continue
+
+        predictor = cls(store, train=False)
+        timed(f"{name}.fit", predictor._train_model, 1)
+        for method in FORECASTS[name]:
+            timed(f"{name}.{method}", getattr(predictor, method))
+
+        if name == "EnergyPredictor":
+            origins = list(predictor.daily_df.index[-30:])
+            timed(f"{name}.predict_next_7_days_batch[30]", lambda: predictor.predict_next_7_days_batch(origins))
+
+    return results
@@ -0,0 +1,53 @@
+"""
+Date/Time parsing on a year of minute data.
+
+    python benchmarks/parse_datetime.py [--days 365] [--repeat 3]
+
+Compares the old concatenate-and-infer path with loader.parse_datetime.
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.timing import best_of
+from loader import parse_datetime
+
+
+def minute_columns(days):
+    """Date and Time string columns laid out like the household dataset."""
+    idx = pd.date_range("2007-01-01", periods=days * 1440, freq="min")
+    date = pd.Series(idx.day.astype(str) + "/" + idx.month.astype(str) + "/" + idx.year.astype(str), dtype=object)
+    time_ = pd.Series(idx.strftime("%H:%M:%S"), dtype=object)
+    return date, time_
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    date, time_ = minute_columns(args.days)
+    print(f"{len(date)} rows")
+
+    cases = {
+        "concat + dayfirst": lambda: pd.to_datetime(date + " " + time_, dayfirst=True),
+        "concat + format": lambda: pd.to_datetime(date + " " + time_, format="%d/%m/%Y %H:%M:%S"),
+        "parse_datetime": lambda: parse_datetime(date, time_),
+    }
+
+    baseline = expected = None
+    for name, func in cases.items():
+        seconds, result = best_of(args.repeat, func), func()
+        if baseline is None:
+            baseline, expected = seconds, result
+        assert (pd.DatetimeIndex(result).astype("datetime64[ns]") == expected.astype("datetime64[ns]")).all(), name
+        print(f"{name:>18}: {seconds * 1000:8.1f} ms  ({baseline / seconds:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
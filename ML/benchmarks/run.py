@@ -0,0 +1,96 @@
+"""
+Run the benchmark suites and store the results as JSON.
+
+    cd ML
+    python -m benchmarks.run --span 1y [--suites micro,load] [--out results.json]
+
+Synthetic data for the span is generated once into --workdir and reused.
+The micro suite times the whole span; the load suite serves it through
+app.py, which keeps load_data()'s default 2007 window. Compare two result
+files with `python -m benchmarks.compare old.json new.json`.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from benchmarks import load_test, micro, synthetic
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def environment():
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def dataset(span, workdir, start):
+    path = os.path.join(workdir, f"household_{span}_{start}.txt")
+    if not os.path.exists(path):
+        print(f"Generating {span} of minute data into {path}")
+        synthetic.write(synthetic.generate(span, start), path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--span", default="3m", help="synthetic data span, 1m .. 4y")
+    parser.add_argument("--start", default="2007-01-01")
+    parser.add_argument("--data", help="benchmark this data file instead of synthetic data")
+    parser.add_argument("--suites", default="micro,load")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-fit", action="store_true", help="skip model fits and forecasts in the micro suite")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "ml_benchmarks"))
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    data_file = args.data or dataset(args.span, args.workdir, args.start)
+    suites = args.suites.split(",")
+
+    results = {"environment": environment(), "data": {"file": data_file, "span": None if args.data else args.span}}
+    if "micro" in suites:
+        print("== micro ==")
+        results["micro"] = micro.run(data_file, repeat=args.repeat, fit=not args.no_fit)
+    if "load" in suites:
+        print("== load ==")
+        models_dir = os.path.join(args.workdir, "models")
+        results["load"] = load_test.run(data_file, models_dir, args.requests, args.concurrency)
+
+    out = args.out
+    if out is None:
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{results['environment']['commit'] or 'nocommit'}.json"
+        out = os.path.join(HERE, "results", name)
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Synthetic household_power data in the layout of the UCI source file.
+
+    python -m benchmarks.synthetic --span 1y --out /tmp/household_1y.txt
+
+Spans are like "1m", "6m", "1y", "4y" (months/years of minute rows). Files
+ending in .txt are ';'-separated with '?' for missing values, like the
+original dataset; .xlsx is limited to about two years by Excel's row cap.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+XLSX_MAX_ROWS = 1_048_575
+
+
+def span_to_periods(span):
+    """'1m' -> months=1, '4y' -> months=48."""
+    count, unit = int(span[:-1]), span[-1].lower()
+    if unit not in ("m", "y"):
+        raise ValueError(f"span must end in 'm' or 'y', got {span!r}")
+    return count * 12 if unit == "y" else count
+
+
+def minute_index(span, start="2007-01-01"):
+    start = pd.Timestamp(start)
+    end = start + pd.DateOffset(months=span_to_periods(span))
+    return pd.date_range(start, end, freq="min", inclusive="left")
+
+
+def _date_strings(idx):
+    # Format every distinct day once instead of once per row
+    codes, days = pd.factorize(idx.normalize())
+    return np.array([f"{d.day}/{d.month}/{d.year}" for d in days], dtype=object)[codes]
+
+
+def _time_strings(idx):
+    labels = np.array([f"{m // 60:02d}:{m % 60:02d}:00" for m in range(1440)], dtype=object)
+    return labels[idx.hour.to_numpy() * 60 + idx.minute.to_numpy()]
+
+
+def generate(span="1y", start="2007-01-01", missing=0.005, seed=0):
+    """
+    Minute readings with daily, weekly and seasonal load shapes.
+
+    Returns a frame with string Date ('16/12/2006') and Time ('17:24:00')
+    columns and the seven meter columns; a `missing` fraction of rows has
+    every measurement blank, as in the real data.
+    """
+    idx = minute_index(span, start)
+    rng = np.random.default_rng(seed)
+    n = len(idx)
+
+    hour = idx.hour.to_numpy() + idx.minute.to_numpy() / 60
+    daily = 0.6 + 0.9 * np.exp(-((hour - 8) ** 2) / 3) + 1.4 * np.exp(-((hour - 20) ** 2) / 5)
+    weekly = np.where(idx.dayofweek.to_numpy() >= 5, 1.15, 1.0)
+    seasonal = 1 + 0.35 * np.cos(2 * np.pi * (idx.dayofyear.to_numpy() - 15) / 365.25)
+    active = daily * weekly * seasonal * rng.gamma(4.0, 0.25, n)
+
+    voltage = 240 + rng.normal(0, 3, n)
+    reactive = 0.05 + 0.08 * active * rng.random(n)
+    intensity = active * 1000 / voltage
+
+    # Sub-meters are Wh per minute and together stay below the active energy
+    budget = active * 1000 / 60
+    shares = rng.dirichlet([0.3, 0.5, 2.0], n) * rng.uniform(0.2, 0.9, (n, 1))
+    sub = np.floor(shares * budget[:, None])
+
+    df = pd.DataFrame({
+        "Date": _date_strings(idx),
+        "Time": _time_strings(idx),
+        "Global_active_power": active.round(3),
+        "Global_reactive_power": reactive.round(3),
+        "Voltage": voltage.round(2),
+        "Global_intensity": intensity.round(1),
+        "Sub_metering_1": sub[:, 0],
+        "Sub_metering_2": sub[:, 1],
+        "Sub_metering_3": sub[:, 2],
+    })
+
+    gaps = rng.random(n) < missing
+    df.loc[gaps, df.columns[2:]] = np.nan
+    return df
+
+
+def write(df, path):
+    if path.endswith(".xlsx"):
+        if len(df) > XLSX_MAX_ROWS:
+            raise ValueError(f"{len(df)} rows do not fit in an .xlsx sheet, write a .txt file instead")
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, sep=";", index=False, na_rep="?")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--span", default="1y", help="1m .. 4y")
+    parser.add_argument("--start", default="2007-01-01")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help=".txt (semicolon separated) or .xlsx")
+    args = parser.parse_args(argv)
+
+    df = generate(args.span, args.start, seed=args.seed)
+    write(df, args.out)
+    print(f"Wrote {len(df)} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import time
+
+
+def best_of(repeat, func):
+    """Fastest of repeat calls of func, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
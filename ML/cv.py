@@ -0,0 +1,221 @@
+"""
+Rolling-origin cross-validation and hyperparameter search for the predictors.
+
+    python cv.py HourlyEnergyPredictor --grid n_estimators=100,300 max_depth=None,10 \
+        [--folds 5] [--test-size N] [--gap N] [--window N] [--workers N] [--out results.json]
+
+Every fold fits on the rows before its origin (all of them, or the last
+--window rows) and scores the next --test-size rows, like the predictors'
+own holdout split but repeated over several origins. The (X, y) matrices are
+built once per data version and saved in the cache, where the worker
+processes memory-map them instead of preparing the features again. Each
+fold's score is cached as soon as it finishes, so an interrupted search
+resumes where it stopped and a grown grid only fits the new combinations.
+"""
+import argparse
+import ast
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
+from sklearn.model_selection import ParameterGrid, TimeSeriesSplit
+
+from estimators import fit_estimator
+from loader import load_data
+from model_registry import artifact_key
+from store import TimeSeriesStore
+from training import PREDICTORS as TRAINED
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# The predictors with (X, y) training sets to cross-validate
+PREDICTORS = [cls for cls in TRAINED if hasattr(cls, "training_sets")]
+
+# Matrices memory-mapped by this worker process, by path
+_matrices = {}
+
+
+def rolling_folds(rows, folds=5, test_size=None, gap=0, window=None):
+    """
+    (train start, train end, test start, test end) row ranges of each fold.
+
+    Origins move forward by test_size rows (default: rows // (folds + 1));
+    gap rows between train and test are skipped, and window caps the
+    training rows (an expanding window by default).
+    """
+    split = TimeSeriesSplit(n_splits=folds, test_size=test_size, gap=gap, max_train_size=window)
+    return [
+        (int(train[0]), int(train[-1]) + 1, int(test[0]), int(test[-1]) + 1)
+        for train, test in split.split(np.empty((rows, 1)))
+    ]
+
+
+def prepare(cls, store, cache_dir, strategy=None):
+    """Save cls's training matrices for store's data; returns (data key, path, rows per model)."""
+    predictor = cls(store, train=False, **({"strategy": strategy} if strategy else {}))
+    key = artifact_key(predictor)
+    path = os.path.join(cache_dir, cls.__name__, key)
+    target = os.path.join(path, "matrices.joblib")
+    sets = predictor.training_sets()
+    if not os.path.exists(target):
+        os.makedirs(path, exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        joblib.dump(sets, tmp)
+        os.replace(tmp, target)
+    return key, path, {attr: len(X) for attr, (X, _) in sets.items()}
+
+
+def _fold_task(matrices, attr, backend, params, fold):
+    """Fit one model on one fold's training rows and score its test rows; runs in a worker process."""
+    if matrices not in _matrices:
+        _matrices[matrices] = joblib.load(matrices, mmap_mode="r")
+    X, y = _matrices[matrices][attr]
+    train_start, train_end, test_start, test_end = fold
+
+    start = time.perf_counter()
+    model = fit_estimator(backend, params, X[train_start:train_end], y[train_start:train_end], n_jobs=1)
+    fit_s = time.perf_counter() - start
+
+    errors = model.predict(X[test_start:test_end]) - y[test_start:test_end]
+    return {
+        "mae": float(np.abs(errors).mean()),
+        "rmse": float(np.sqrt((errors ** 2).mean())),
+        "fit_s": fit_s,
+        "train_rows": train_end - train_start,
+        "test_rows": test_end - test_start,
+    }
+
+
+def _result_path(path, attr, backend, params, fold):
+    spec = json.dumps({"model": attr, "backend": backend, "params": params, "fold": fold}, sort_keys=True)
+    return os.path.join(path, "folds", hashlib.sha256(spec.encode()).hexdigest()[:16] + ".json")
+
+
+def _save_result(target, result):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(result, f)
+    os.replace(tmp, target)
+
+
+def search(
+    data_file, name, grid=None, folds=5, test_size=None, gap=0, window=None,
+    backend="forest", strategy=None, workers=None, cache_dir=None,
+):
+    """
+    Cross-validate every combination of grid over predictor class name.
+
+    grid maps parameter names to candidate values; each combination
+    overrides the predictor's PARAMS (an empty grid scores PARAMS as is).
+    backend is an estimators.BACKENDS name, for predictors that take one
+    (hist_gb keeps its own settings, the grid only applies to forests);
+    strategy likewise only applies to predictors that take one.
+    Returns one row per combination, best (lowest mean MAE) first.
+    """
+    cls = next(c for c in PREDICTORS if c.__name__ == name)
+    if backend != "forest" and "backend" not in inspect.signature(cls).parameters:
+        raise ValueError(f"{name} only fits the forest backend")
+    if strategy is not None and "strategy" not in inspect.signature(cls).parameters:
+        raise ValueError(f"{name} only forecasts recursively, it takes no strategy")
+    cache_dir = cache_dir or os.path.join(HERE, "cv_cache")
+
+    key, path, rows = prepare(cls, TimeSeriesStore(load_data(data_file)), cache_dir, strategy)
+    matrices = os.path.join(path, "matrices.joblib")
+    splits = {attr: rolling_folds(n, folds, test_size, gap, window) for attr, n in rows.items()}
+    combos = list(ParameterGrid(grid or {}))
+
+    results = {}
+    pending = []
+    for i, combo in enumerate(combos):
+        params = {**cls.PARAMS, **combo}
+        for attr in cls.MODELS:
+            for fold in splits[attr]:
+                target = _result_path(path, attr, backend, params, fold)
+                if os.path.exists(target):
+                    with open(target) as f:
+                        results[i, attr, fold] = json.load(f)
+                else:
+                    pending.append((i, attr, fold, params, target))
+
+    print(f"{name} (data {key}): {len(combos)} combinations, {len(results)} folds cached, {len(pending)} to fit")
+    if pending:
+        workers = workers or min(len(pending), os.cpu_count() or 1)
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_fold_task, matrices, attr, backend, params, fold): (i, attr, fold, target)
+                for i, attr, fold, params, target in pending
+            }
+            for future in as_completed(futures):
+                i, attr, fold, target = futures[future]
+                results[i, attr, fold] = result = future.result()
+                # Saved as they finish, an interrupted search keeps its progress
+                _save_result(target, result)
+        print(f"Fitted {len(pending)} folds on {workers} workers in {time.perf_counter() - start:.1f}s")
+
+    table = []
+    for i, combo in enumerate(combos):
+        models = {}
+        for attr in cls.MODELS:
+            maes = [results[i, attr, fold]["mae"] for fold in splits[attr]]
+            models[attr] = {"mae": float(np.mean(maes)), "mae_std": float(np.std(maes)), "fold_mae": maes}
+        table.append({
+            "params": combo,
+            "mae": float(np.mean([m["mae"] for m in models.values()])),
+            "fit_s": sum(results[i, attr, fold]["fit_s"] for attr in cls.MODELS for fold in splits[attr]),
+            "models": models,
+        })
+    return sorted(table, key=lambda row: row["mae"])
+
+
+def parse_grid(values):
+    """["n_estimators=100,300", "max_depth=None,10"] -> {"n_estimators": [100, 300], "max_depth": [None, 10]}"""
+    grid = {}
+    for item in values:
+        name, candidates = item.split("=", 1)
+        grid[name] = []
+        for value in candidates.split(","):
+            try:
+                grid[name].append(ast.literal_eval(value))
+            except (ValueError, SyntaxError):
+                grid[name].append(value)
+    return grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("predictor", choices=[cls.__name__ for cls in PREDICTORS])
+    parser.add_argument("--data", default=os.path.join(HERE, "household_power_cleaned.xlsx"))
+    parser.add_argument("--grid", nargs="+", default=[], help="param=v1,v2 candidates (default: the predictor's PARAMS)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--test-size", type=int, help="rows scored per fold (default: rows / (folds + 1))")
+    parser.add_argument("--gap", type=int, default=0, help="rows skipped between training and test rows")
+    parser.add_argument("--window", type=int, help="training rows per fold (default: all rows before the origin)")
+    parser.add_argument("--backend", default="forest", help="estimator backend (EnergyPredictor, HourlyEnergyPredictor)")
+    parser.add_argument("--strategy", help="forecasting strategy (HourlyEnergyPredictor, EfficiencyForecast7D)")
+    parser.add_argument("--workers", type=int, help="processes (default: one per fold, up to the core count)")
+    parser.add_argument("--cache", default=os.path.join(HERE, "cv_cache"))
+    parser.add_argument("--out", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    table = search(
+        args.data, args.predictor, parse_grid(args.grid), args.folds, args.test_size, args.gap, args.window,
+        args.backend, args.strategy, args.workers, args.cache,
+    )
+    for row in table:
+        spread = ", ".join(f"{attr} {m['mae']:.4f} ± {m['mae_std']:.4f}" for attr, m in row["models"].items())
+        print(f"  MAE {row['mae']:.4f} ({spread})  fit {row['fit_s']:.1f}s  {row['params'] or 'PARAMS'}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(table, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
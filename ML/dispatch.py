@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import observe
+
+
+class Overloaded(Exception):
+    """Raised when an executor already holds as much work as it accepts."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a cap on running plus queued jobs, awaited from async routes.
+
+    Submitting beyond workers + max_pending raises Overloaded immediately
+    instead of letting the queue (and response times) grow without bound.
+    """
+
+    def __init__(self, name, workers, max_pending):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rejected = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    async def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise Overloaded(f"{self.name} executor is full, retry later")
+
+        submitted = time.perf_counter()
+
+        def job():
+            observe(f"executor.{self.name}.wait", time.perf_counter() - submitted)
+            return func(*args)
+
+        try:
+            future = self._pool.submit(job)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Released when the job finishes, even if the awaiting request is gone
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+
+class Coalescer:
+    """
+    Shares one in-flight computation between concurrent callers of the same key.
+
+    Must be used from a single event loop. The shared task is shielded, so a
+    client disconnecting does not cancel the work for the other waiters.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    async def run(self, key, start):
+        """start() returns the coroutine to run if key is not already in flight."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(start())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
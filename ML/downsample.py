@@ -0,0 +1,63 @@
+"""
+Point selection for charting long series with a bounded number of points.
+
+Both functions take the x (e.g. int64 timestamps) and y values of a series
+without NaNs and return the sorted indices of the points to keep.
+"""
+import numpy as np
+
+
+def lttb(x, y, n):
+    """
+    Largest-Triangle-Three-Buckets: n points that keep the visual shape.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previous
+    pick and the average of the next bucket.
+    """
+    size = len(y)
+    if n >= size or n < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n - 2 buckets over the interior points, as equal as possible
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    lengths = np.diff(edges)
+    mean_x = np.add.reduceat(x[:-1], edges[:-1]) / lengths
+    mean_y = np.add.reduceat(y[:-1], edges[:-1]) / lengths
+    # The last bucket looks ahead to the last point
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    picked = np.empty(n, dtype=np.int64)
+    picked[0], picked[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Twice the area of the triangle (previous pick, candidate, next average)
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def min_max(x, y, n):
+    """The minimum and maximum of n // 2 equal-width groups, so no peak is lost."""
+    size = len(y)
+    if n >= size or n < 2:
+        return np.arange(size)
+
+    width = -(-size // (n // 2))
+    groups = -(-size // width)
+    # Pad the last group; NaN never wins either comparison
+    blocks = np.full(groups * width, np.nan)
+    blocks[:size] = y
+    blocks = blocks.reshape(groups, width)
+    offsets = np.arange(groups) * width
+    lows = offsets + np.argmin(np.where(np.isnan(blocks), np.inf, blocks), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(blocks), -np.inf, blocks), axis=1)
+    return np.unique(np.concatenate([lows, highs]))
+
+
+DOWNSAMPLERS = {"lttb": lttb, "minmax": min_max}
@@ -1,6 +1,44 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
+from forecaster import DirectForecaster, RecursiveForecaster, direct_targets
+from incremental import interpolate_tail, power_factor, splice, tail_window
+from metrics import timed
+
+EFFICIENCY_FEATURES = ["lag_1", "lag_2", "lag_24", "lag_48", "hour", "dayofweek"]
+EFFICIENCY_LAGS = ["lag_1", "lag_2", "lag_24", "lag_48"]
+
+DAILY_FEATURES = ["lag_1", "lag_2", "lag_3", "dayofweek"]
+DAILY_LAGS = ["lag_1", "lag_2", "lag_3"]
+
+def efficiency_calendar(times):
+    return {"hour": times.hour, "dayofweek": times.dayofweek}
+
+def daily_efficiency_calendar(times):
+    return {"dayofweek": times.dayofweek}
+
+def clip_unit(values):
+    # Clip to 0-1 to ensure efficiency is realistic
+    return np.clip(values, 0, 1)
+
+def forecast_efficiency(rf_active, rf_reactive, last_row, periods):
+    """
+    Recursive hourly active/reactive forecast from one feature row.
+
+    The lag slots shift as lag_48 <- lag_24 <- lag_2 <- lag_1 <- prediction,
+    and the first step uses the calendar features of last_row itself.
+    Returns an (periods, 3) array of active, reactive and power factor.
+    """
+    engine = RecursiveForecaster(
+        [rf_active, rf_reactive], EFFICIENCY_FEATURES, EFFICIENCY_LAGS, efficiency_calendar
+    )
+    lags = [last_row[name] for name in EFFICIENCY_LAGS]
+    times = last_row.name + pd.to_timedelta(np.arange(periods), unit="h")
+    preds = engine.forecast(lags, times)
+
+    pred_active, pred_reactive = preds[:, 0], preds[:, 1]
+    pf = pred_active / np.sqrt(pred_active ** 2 + pred_reactive ** 2)
+    return np.column_stack([pred_active, pred_reactive, pf])
 
 def build_features(power_hourly):
     df = power_hourly.copy()
@@ -19,64 +57,77 @@ def build_features(power_hourly):
     return df
 
 class EfficiencyForecast24H:
-    def __init__(self, df):
+    PARAMS = {"n_estimators": 200, "random_state": 42}
+    MODELS = ("rf_active", "rf_reactive")
+    # Incremental refresh (see refresh.py): new trees per refresh, fitted on the last window hours
+    REFRESH = {"trees": 20, "window": 60 * 24}
+
+    def __init__(self, store, train=True):
         """
-        df → cleaned dataframe from loader.load_data()
+        store → TimeSeriesStore built from loader.load_data()
+        train=False only prepares the features (models come from a ModelRegistry)
         """
-        self.df = df
-        # Keep only numeric columns before resampling
-        df_numeric = df.select_dtypes(include=[np.number])
-
-        # Hourly aggregation
-        self.power_hourly = df_numeric.resample("h").mean()
+        self.store = store
+        self.rf_active = None
+        self.rf_reactive = None
+        self.model_version = None
+        self._prepare_data()
+        if train:
+            self._train_model()
+
+    @timed("EfficiencyForecast24H.prepare")
+    def _prepare_data(self):
+        # Hourly aggregation (own copy of the shared view, p_factor is added)
+        self.power_hourly = self.store.hourly.copy()
 
         # Step 2: power factor
-        self.power_hourly["p_factor"] = self.power_hourly["Global_active_power"] / np.sqrt(
-            self.power_hourly["Global_active_power"] ** 2 +
-            self.power_hourly["Global_reactive_power"] ** 2
-        )
-        self.power_hourly["p_factor"] = self.power_hourly["p_factor"].replace([np.inf, -np.inf], np.nan).interpolate()
-
-        self.power_hourly = self.power_hourly
+        self.power_hourly["p_factor"] = power_factor(self.power_hourly).interpolate()
 
         # Step 3: build ML features
         self.feature_df = build_features(self.power_hourly)
 
-        # Step 4: train models
-        X = self.feature_df[["lag_1", "lag_2", "lag_24", "lag_48", "hour", "dayofweek"]]
-        y_active = self.feature_df["Global_active_power"]
-        y_reactive = self.feature_df["Global_reactive_power"]
-
-        self.rf_active = RandomForestRegressor(n_estimators=200, random_state=42)
-        self.rf_reactive = RandomForestRegressor(n_estimators=200, random_state=42)
+    @timed("EfficiencyForecast24H.update")
+    def update(self, since):
+        """
+        Take in minute rows appended to the store from since onward.
 
-        self.rf_active.fit(X, y_active)
-        self.rf_reactive.fit(X, y_reactive)
+        Only the hours from since's hour on are replaced, and only those rows
+        get new lag features.
+        """
+        cut = pd.Timestamp(since).floor("h")
+        tail = self.store.hourly.loc[cut:].copy()
+        tail["p_factor"] = power_factor(tail)
+
+        hourly = splice(self.power_hourly, tail, cut)
+        hourly["p_factor"] = interpolate_tail(hourly["p_factor"], cut)
+        self.power_hourly = hourly
+
+        features = build_features(tail_window(hourly, cut, 48))
+        self.feature_df = splice(self.feature_df, features, cut)
+
+    def training_frame(self):
+        return self.feature_df
+
+    def training_sets(self):
+        """(X, y) arrays per model attribute, in time order."""
+        # On arrays, forecasting feeds ndarrays
+        X = self.feature_df[EFFICIENCY_FEATURES].to_numpy()
+        targets = {"rf_active": "Global_active_power", "rf_reactive": "Global_reactive_power"}
+        return {attr: (X, self.feature_df[column].to_numpy()) for attr, column in targets.items()}
+
+    @timed("EfficiencyForecast24H.fit")
+    def _train_model(self, models=None, n_jobs=None):
+        """Fit models (a subset of MODELS, all by default) with n_jobs cores each."""
+        # Step 4: train models
+        sets = self.training_sets()
+        for attr in models or self.MODELS:
+            model = RandomForestRegressor(**self.PARAMS, n_jobs=n_jobs)
+            model.fit(*sets[attr])
+            setattr(self, attr, model.set_params(n_jobs=None))
 
+    @timed("EfficiencyForecast24H.forecast")
     def predict_next_24_hours(self):
-        last_data = self.feature_df.iloc[-1:].copy()
-        future_predictions = []
-
-        for _ in range(24):
-            features = last_data[["lag_1", "lag_2", "lag_24", "lag_48", "hour", "dayofweek"]]
-
-            pred_active = self.rf_active.predict(features)[0]
-            pred_reactive = self.rf_reactive.predict(features)[0]
-
-            pf = pred_active / np.sqrt(pred_active ** 2 + pred_reactive ** 2)
-
-            future_predictions.append([pred_active, pred_reactive, pf])
-
-            # update lags
-            last_data["lag_48"] = last_data["lag_24"]
-            last_data["lag_24"] = last_data["lag_2"]
-            last_data["lag_2"] = last_data["lag_1"]
-            last_data["lag_1"] = pred_active
-
-            next_time = last_data.index[0] + pd.Timedelta(hours=1)
-            last_data.index = [next_time]
-            last_data["hour"] = next_time.hour
-            last_data["dayofweek"] = next_time.dayofweek
+        future_predictions = forecast_efficiency(self.rf_active, self.rf_reactive, self.feature_df.iloc[-1], 24)
 
         future_index = pd.date_range(
             start=self.power_hourly.index[-1] + pd.Timedelta(hours=1),
@@ -93,70 +144,105 @@ class EfficiencyForecast24H:
         return forecast_df
 
 class EfficiencyForecast7D:
-    def __init__(self, df):
+    PARAMS = {"n_estimators": 200, "random_state": 42}
+    MODELS = ("model",)
+    HORIZON = 7
+    REFRESH = {"trees": 20, "window": 90}
+
+    def __init__(self, store, train=True, strategy="recursive"):
         """
-        df → cleaned dataframe from loader.load_data()
+        store → TimeSeriesStore built from loader.load_data()
+        train=False only prepares the features (model comes from a ModelRegistry)
+        strategy → "recursive" (day by day, feeding predictions back) or
+                   "direct" (one multi-output model for all HORIZON days)
         """
-        self.df = df.copy()
-        
-        # Use only numeric columns
-        numeric_df = df.select_dtypes(include=['number'])
-        
-        # Resample to daily
-        daily = numeric_df.resample("D").mean()
-        
+        if strategy not in ("recursive", "direct"):
+            raise ValueError(f"unknown strategy {strategy!r}")
+        self.store = store
+        self.strategy = strategy
+        self.model = None
+        self.model_version = None
+        self._prepare_data()
+        if train:
+            self._train_model()
+
+    @timed("EfficiencyForecast7D.prepare")
+    def _prepare_data(self):
+        # Daily means (own copy of the shared view, p_factor is added)
+        daily = self.store.daily.copy()
+
         # Calculate daily efficiency (power factor)
-        daily["p_factor"] = daily["Global_active_power"] / np.sqrt(
-            daily["Global_active_power"] ** 2 + daily["Global_reactive_power"] ** 2
-        )
-        daily["p_factor"] = daily["p_factor"].replace([np.inf, -np.inf], np.nan).interpolate()
-        
-        self.daily = daily.dropna(subset=["p_factor"])
-        
-        # Feature engineering for ML
-        self.daily["lag_1"] = self.daily["p_factor"].shift(1)
-        self.daily["lag_2"] = self.daily["p_factor"].shift(2)
-        self.daily["lag_3"] = self.daily["p_factor"].shift(3)
-        self.daily["dayofweek"] = self.daily.index.dayofweek
-        
-        self.daily = self.daily.dropna()
-        
+        daily["p_factor"] = power_factor(daily).interpolate()
+
+        self.daily_mean = daily.dropna(subset=["p_factor"])
+        self.daily = self._build_features(self.daily_mean)
+
         # Features & target
-        self.X = self.daily[["lag_1", "lag_2", "lag_3", "dayofweek"]]
+        self.X = self.daily[DAILY_FEATURES]
         self.y = self.daily["p_factor"]
-        
+
+    def _build_features(self, daily_mean):
+        # Feature engineering for ML
+        daily = daily_mean.copy()
+        daily["lag_1"] = daily["p_factor"].shift(1)
+        daily["lag_2"] = daily["p_factor"].shift(2)
+        daily["lag_3"] = daily["p_factor"].shift(3)
+        daily["dayofweek"] = daily.index.dayofweek
+
+        return daily.dropna()
+
+    @timed("EfficiencyForecast7D.update")
+    def update(self, since):
+        """Take in minute rows appended to the store from since onward (tail days only)."""
+        cut = pd.Timestamp(since).floor("D")
+        tail = self.store.daily.loc[cut:].copy()
+        tail["p_factor"] = power_factor(tail)
+
+        daily = splice(self.daily_mean, tail, cut)
+        daily["p_factor"] = interpolate_tail(daily["p_factor"], cut)
+        self.daily_mean = daily.dropna(subset=["p_factor"])
+
+        features = self._build_features(tail_window(self.daily_mean, cut, len(DAILY_LAGS)))
+        self.daily = splice(self.daily, features, cut)
+        self.X = self.daily[DAILY_FEATURES]
+        self.y = self.daily["p_factor"]
+
+    def training_frame(self):
+        return self.daily
+
+    def training_sets(self):
+        """(X, y) arrays per model attribute, in time order."""
+        X, y = self.X, self.y
+        if self.strategy == "direct":
+            # Row t predicts days t .. t+6, matching the recursion's steps
+            y = direct_targets(y, self.HORIZON, pd.Timedelta(days=1))
+            complete = y.notna().all(axis=1)
+            X, y = X[complete], y[complete]
+        return {"model": (X.to_numpy(), y.to_numpy())}
+
+    @timed("EfficiencyForecast7D.fit")
+    def _train_model(self, n_jobs=None):
         # Train Random Forest
-        self.model = RandomForestRegressor(n_estimators=200, random_state=42)
-        self.model.fit(self.X, self.y)
-    
+        self.model = RandomForestRegressor(**self.PARAMS, n_jobs=n_jobs)
+        self.model.fit(*self.training_sets()["model"])
+        self.model.set_params(n_jobs=None)
+
+    @timed("EfficiencyForecast7D.forecast")
     def predict_next_7_days(self):
-        last_row = self.daily.iloc[-1:].copy()
-        future_predictions = []
-        future_dates = []
-
-        for i in range(7):
-            features = last_row[["lag_1", "lag_2", "lag_3", "dayofweek"]]
-            pred = self.model.predict(features)[0]
-
-            # Clip to 0-1 to ensure efficiency is realistic
-            pred = np.clip(pred, 0, 1)
-            
-            future_predictions.append(pred)
-            
-            # Prepare next row for rolling prediction
-            next_date = last_row.index[0] + pd.Timedelta(days=1)
-            future_dates.append(next_date)
-            
-            new_row = last_row.copy()
-            new_row["lag_3"] = new_row["lag_2"]
-            new_row["lag_2"] = new_row["lag_1"]
-            new_row["lag_1"] = pred
-            new_row["dayofweek"] = next_date.dayofweek
-            new_row.index = [next_date]
-            last_row = new_row
+        last_row = self.daily.iloc[-1]
+
+        # The first step reuses last_row's own features, later steps advance a day
+        engine = (DirectForecaster if self.strategy == "direct" else RecursiveForecaster)(
+            [self.model], DAILY_FEATURES, DAILY_LAGS, daily_efficiency_calendar, postprocess=clip_unit
+        )
+        lags = [last_row[name] for name in DAILY_LAGS]
+        steps = pd.to_timedelta(np.arange(7), unit="D")
+        future_predictions = engine.forecast(lags, last_row.name + steps)[:, 0]
+
+        future_dates = last_row.name + steps + pd.Timedelta(days=1)
 
         forecast_df = pd.DataFrame({
             "Predicted_Efficiency": future_predictions
         }, index=future_dates)
-        
-        return forecast_df
\ No newline at end of file
+
+        return forecast_df
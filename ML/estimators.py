@@ -0,0 +1,168 @@
+"""
+Estimator backends the predictors can be fitted with.
+
+    forest          the default: unrestricted RandomForestRegressor
+    forest_limited  the same forest with the depth/leaf limits of "RF (Hour).py"
+    hist_gb         HistGradientBoostingRegressor (one per output for direct forecasts)
+    compiled        the default forest, flattened into a CompiledForest for inference
+"""
+import copy
+import weakref
+
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.multioutput import MultiOutputRegressor
+
+BACKENDS = ("forest", "forest_limited", "hist_gb", "compiled")
+
+# Limits used in the "RF (Hour).py" experiment
+LIMITED_FOREST = {"max_depth": 10, "min_samples_split": 5, "min_samples_leaf": 2}
+HIST_GB = {"max_iter": 300, "learning_rate": 0.05}
+
+
+class CompiledForest:
+    """
+    A fitted regression forest flattened into contiguous node arrays.
+
+    Every tree lives in the same arrays, with leaves pointing to themselves,
+    so a batch is evaluated in exactly max_depth vectorized steps over a
+    (rows, trees) matrix of node ids. Single-row predict then costs a few
+    dozen NumPy operations instead of a Python call per tree plus joblib
+    dispatch, and the arrays pickle (and memory-map) compactly.
+    """
+
+    def __init__(self, forest):
+        trees = [est.tree_ for est in forest.estimators_]
+        sizes = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        self.roots = offsets.astype(np.intp)
+        self.feature = np.concatenate([tree.feature for tree in trees]).astype(np.intp)
+        self.threshold = np.concatenate([tree.threshold for tree in trees])
+        self.left = np.concatenate([tree.children_left + off for tree, off in zip(trees, offsets)]).astype(np.intp)
+        self.right = np.concatenate([tree.children_right + off for tree, off in zip(trees, offsets)]).astype(np.intp)
+        self.value = np.concatenate([tree.value[:, :, 0] for tree in trees])
+        self.depth = max(tree.max_depth for tree in trees)
+        self.n_features_in_ = forest.n_features_in_
+        self.n_outputs_ = forest.n_outputs_
+
+        # Leaves loop back onto themselves, so extra steps are harmless
+        leaf = np.concatenate([tree.children_left for tree in trees]) < 0
+        nodes = np.arange(len(leaf))
+        self.left[leaf] = nodes[leaf]
+        self.right[leaf] = nodes[leaf]
+        self.feature[leaf] = 0
+
+    def refreshed(self, forest, max_trees):
+        """
+        A new CompiledForest with the trees of the fitted forest appended
+        after this one's and the oldest dropped beyond max_trees (which must
+        leave room for every new tree). Kept nodes are only shifted.
+        """
+        fresh = CompiledForest(forest)
+        drop = min(max(len(self.roots) + len(fresh.roots) - max_trees, 0), len(self.roots))
+        cut = self.roots[drop] if drop < len(self.roots) else len(self.feature)
+        shift = len(self.feature) - cut
+
+        combined = copy.copy(fresh)
+        combined.roots = np.concatenate([self.roots[drop:] - cut, fresh.roots + shift])
+        combined.feature = np.concatenate([self.feature[cut:], fresh.feature])
+        combined.threshold = np.concatenate([self.threshold[cut:], fresh.threshold])
+        combined.left = np.concatenate([self.left[cut:] - cut, fresh.left + shift])
+        combined.right = np.concatenate([self.right[cut:] - cut, fresh.right + shift])
+        combined.value = np.concatenate([self.value[cut:], fresh.value])
+        # An upper bound is enough: leaves loop back onto themselves
+        combined.depth = max(self.depth, fresh.depth) if drop < len(self.roots) else fresh.depth
+        return combined
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.roots, self.feature, self.threshold, self.left, self.right, self.value))
+
+    def nodes(self):
+        """feature, threshold, left, right as plain ndarrays."""
+        # Loaded arrays are np.memmap, whose indexing results are memmaps too:
+        # that wrapping costs more than the lookups at these sizes
+        return tuple(np.asarray(a) for a in (self.feature, self.threshold, self.left, self.right))
+
+    def walk(self, X, node):
+        """Leaf reached from each node in node for the matching row of X."""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        feature, threshold, left, right = self.nodes()
+        rows = np.arange(len(X)).reshape((-1,) + (1,) * (node.ndim - 1))
+        for _ in range(self.depth):
+            go_left = X[rows, feature[node]] <= threshold[node]
+            node = np.where(go_left, left[node], right[node])
+        return node
+
+    def apply(self, X):
+        """Leaf id in the flat arrays for every (row, tree)."""
+        return self.walk(X, np.broadcast_to(np.asarray(self.roots), (len(X), len(self.roots))))
+
+    def predict(self, X):
+        pred = np.asarray(self.value)[self.apply(X)].mean(axis=1)
+        return pred[:, 0] if self.n_outputs_ == 1 else pred
+
+
+class TreePaths:
+    """
+    A CompiledForest evaluated one tree per row: row i goes through tree
+    i % trees only. A RecursiveForecaster given every origin's lags once per
+    tree thus runs each tree along its own recursive path, all trees in one
+    batched pass per step.
+    """
+
+    def __init__(self, forest):
+        self.forest = forest
+        self.trees = len(forest.roots)
+
+    def predict(self, X):
+        forest = self.forest
+        pred = np.asarray(forest.value)[forest.walk(X, np.tile(np.asarray(forest.roots), len(X) // self.trees))]
+        return pred[:, 0] if forest.n_outputs_ == 1 else pred
+
+
+# sklearn forests compiled for per-tree outputs, once per fitted model
+_compiled = weakref.WeakKeyDictionary()
+
+
+def compile_forest(model):
+    """model (a forest or compiled backend) as a CompiledForest; ValueError for other backends."""
+    if isinstance(model, CompiledForest):
+        return model
+    if not isinstance(model, RandomForestRegressor):
+        raise ValueError(f"{type(model).__name__} has no per-tree outputs to take intervals from")
+    compiled = _compiled.get(model)
+    if compiled is None:
+        compiled = _compiled[model] = CompiledForest(model)
+    return compiled
+
+
+def make_estimator(backend, params, n_jobs=None, multi_output=False):
+    """Unfitted estimator for backend; params are the predictor's forest PARAMS."""
+    if backend in ("forest", "compiled"):
+        return RandomForestRegressor(**params, n_jobs=n_jobs)
+    if backend == "forest_limited":
+        return RandomForestRegressor(**{**params, **LIMITED_FOREST}, n_jobs=n_jobs)
+    if backend == "hist_gb":
+        model = HistGradientBoostingRegressor(**HIST_GB, random_state=params.get("random_state"))
+        return MultiOutputRegressor(model, n_jobs=n_jobs) if multi_output else model
+    raise ValueError(f"unknown backend {backend!r}, expected one of {BACKENDS}")
+
+
+def fit_estimator(backend, params, X, y, n_jobs=None):
+    """
+    Fit backend on X, y with n_jobs cores.
+
+    The returned model predicts single-threaded: forecasts call it with one
+    small batch per step, where thread dispatch costs more than it saves.
+    """
+    y = np.asarray(y)
+    model = make_estimator(backend, params, n_jobs, multi_output=y.ndim > 1)
+    model.fit(X, y)
+    if backend == "compiled":
+        return CompiledForest(model)
+    if "n_jobs" in model.get_params(deep=False):
+        model.set_params(n_jobs=None)
+    return model
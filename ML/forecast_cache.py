@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+
+
+class ForecastCache:
+    """
+    LRU memo for forecast results.
+
+    Keys are (generation, forecast name, model version, origin timestamp,
+    horizon, ...). The generation is read before the data the rest of the
+    key comes from and invalidate() advances it, so a key built before new
+    data arrived never matches one built after, and a result whose
+    generation ended while it was computed is returned but not stored.
+    Error results ({"error": ...}) are returned but never stored either.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Cached value for key (counted as a hit), or default without counting a miss."""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Computed outside the lock so one slow forecast does not block the rest
+        value = compute()
+
+        if isinstance(value, dict) and "error" in value:
+            return value
+        with self._lock:
+            if key[0] != self.generation:
+                return value
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, name=None):
+        """Drop every entry and start a new generation, or drop only the entries of one forecast name."""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                self.generation += 1
+            else:
+                for key in [k for k in self._entries if k[1] == name]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,186 @@
+import copy
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from estimators import TreePaths
+from metrics import timed
+
+# Percentiles of the tree paths reported by interval forecasts
+QUANTILES = (10, 50, 90)
+
+
+def path_quantiles(paths, quantiles=QUANTILES):
+    """Percentiles over the tree axis of (N, trees, H) paths, as an (N, H, len(quantiles)) array."""
+    return np.percentile(paths, quantiles, axis=1).transpose(1, 2, 0)
+
+
+class RecursiveForecaster:
+    """
+    Recursive multi-step forecaster working on plain NumPy arrays.
+
+    The lag state lives in a preallocated ring buffer with one row per origin.
+    Each step gathers the lag slots and the precomputed calendar features into
+    the feature matrix, calls the estimators on the raw ndarray and pushes the
+    primary estimator's prediction back into the buffer.
+
+    estimators: fitted regressors; the first one drives the recursion
+    feature_names: column order the estimators were fitted on
+    lag_names: lag columns in slot order, newest value first
+    calendar: function(DatetimeIndex) -> {column: array} for the other features
+    postprocess: optional function applied to the primary prediction before
+        it is stored and fed back (e.g. clipping)
+    """
+
+    def __init__(self, estimators, feature_names, lag_names, calendar, postprocess=None):
+        self.estimators = list(estimators)
+        self.feature_names = list(feature_names)
+        self.lag_cols = np.array([self.feature_names.index(name) for name in lag_names])
+        self.calendar = calendar
+        self.calendar_names = [name for name in self.feature_names if name not in lag_names]
+        self.calendar_cols = np.array([self.feature_names.index(name) for name in self.calendar_names], dtype=int)
+        self.postprocess = postprocess
+
+        # Estimators fitted on DataFrames warn when given an ndarray
+        self._named = any(hasattr(est, 'feature_names_in_') for est in self.estimators)
+
+    def _calendar_features(self, times):
+        flat = pd.DatetimeIndex(times.ravel())
+        features = self.calendar(flat)
+        out = np.empty((len(flat), len(self.calendar_names)))
+        for j, name in enumerate(self.calendar_names):
+            out[:, j] = np.asarray(features[name], dtype=float)
+        return out.reshape(times.shape + (len(self.calendar_names),))
+
+    @timed("forecast.recursion")
+    def forecast_batch(self, lags, times):
+        """
+        Run the recursion for several origins at once.
+
+        lags: (N, K) initial lag slots per origin, newest first
+        times: (N, H) timestamps whose calendar features are used at each step
+        Returns an (N, H, len(estimators)) array of predictions.
+        """
+        lags = np.asarray(lags, dtype=float)
+        times = np.asarray(times, dtype='datetime64[ns]')
+        n, k = lags.shape
+        horizon = times.shape[1]
+
+        # Feature matrix laid out step-major so every step is a contiguous (N, F) block
+        X = np.empty((horizon, n, len(self.feature_names)))
+        X[:, :, self.calendar_cols] = self._calendar_features(times).transpose(1, 0, 2)
+
+        # Slot j of the ring buffer is buf[:, (head - j) % k]
+        buf = np.ascontiguousarray(lags[:, ::-1])
+        head = k - 1
+        gather = [(h - np.arange(k)) % k for h in range(k)]
+
+        out = np.empty((horizon, n, len(self.estimators)))
+        with warnings.catch_warnings():
+            if self._named:
+                warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+            for i in range(horizon):
+                x = X[i]
+                x[:, self.lag_cols] = buf[:, gather[head]]
+
+                with timed("forecast.predict_step"):
+                    y = self.estimators[0].predict(x)
+                    if self.postprocess is not None:
+                        y = self.postprocess(y)
+                    out[i, :, 0] = y
+                    for e, est in enumerate(self.estimators[1:], start=1):
+                        out[i, :, e] = est.predict(x)
+
+                head = (head + 1) % k
+                buf[:, head] = y
+
+        return out.transpose(1, 0, 2)
+
+    @timed("forecast.paths")
+    def forecast_paths(self, forest, lags, times):
+        """
+        Recursion of every tree of a CompiledForest on its own: each tree is a
+        particle feeding its predictions back into its own lag buffer, so the
+        spread of the paths grows along the horizon. Takes the lags and times
+        of forecast_batch; returns an (N, trees, H) array.
+        """
+        paths = TreePaths(forest)
+        engine = copy.copy(self)
+        engine.estimators = [paths]
+        engine._named = False
+        lags = np.repeat(np.asarray(lags, dtype=float), paths.trees, axis=0)
+        times = np.repeat(np.asarray(times, dtype='datetime64[ns]'), paths.trees, axis=0)
+        out = engine.forecast_batch(lags, times)[:, :, 0]
+        return out.reshape(-1, paths.trees, out.shape[1])
+
+    def forecast(self, lags, times):
+        """Single-origin recursion; returns an (H, len(estimators)) array."""
+        times = np.asarray(times, dtype='datetime64[ns]')
+        return self.forecast_batch(np.asarray(lags, dtype=float)[None, :], times[None, :])[0]
+
+
+def direct_targets(series, horizon, step):
+    """
+    Targets for direct forecasting: column h holds series at t + h * step.
+
+    Looked up by timestamp, so gaps in the index give NaN instead of
+    silently pairing rows that are not h steps apart.
+    """
+    index = series.index
+    return pd.DataFrame(
+        {h: series.reindex(index + h * step).to_numpy() for h in range(horizon)},
+        index=index,
+    )
+
+
+class DirectForecaster(RecursiveForecaster):
+    """
+    Direct multi-horizon forecaster: one multi-output estimator, fitted on
+    direct_targets(), predicts every step from the first step's features.
+
+    Takes the same lags/times as RecursiveForecaster, so the two are
+    interchangeable, but the whole horizon comes from a single predict call
+    and no prediction is fed back. Only the first column of times is used.
+    """
+
+    def _features(self, lags, times):
+        X = np.empty((len(lags), len(self.feature_names)))
+        X[:, self.calendar_cols] = self._calendar_features(times[:, :1])[:, 0]
+        X[:, self.lag_cols] = lags
+        return X
+
+    @timed("forecast.direct")
+    def forecast_batch(self, lags, times):
+        lags = np.asarray(lags, dtype=float)
+        times = np.asarray(times, dtype='datetime64[ns]')
+        horizon = times.shape[1]
+        X = self._features(lags, times)
+
+        with warnings.catch_warnings():
+            if self._named:
+                warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            y = self.estimators[0].predict(X).reshape(len(X), -1)
+
+        if y.shape[1] < horizon:
+            raise ValueError(f"model was fitted for {y.shape[1]} steps, {horizon} requested")
+        y = y[:, :horizon]
+        if self.postprocess is not None:
+            y = self.postprocess(y)
+        return y[:, :, None]
+
+    @timed("forecast.paths")
+    def forecast_paths(self, forest, lags, times):
+        """Every tree's outputs for the whole horizon, from one apply: an (N, trees, H) array."""
+        lags = np.asarray(lags, dtype=float)
+        times = np.asarray(times, dtype='datetime64[ns]')
+        horizon = times.shape[1]
+        # (N, trees, outputs): the leaf values of every tree for every origin
+        y = np.asarray(forest.value)[forest.apply(self._features(lags, times))]
+        if y.shape[2] < horizon:
+            raise ValueError(f"model was fitted for {y.shape[2]} steps, {horizon} requested")
+        y = y[:, :, :horizon]
+        if self.postprocess is not None:
+            y = self.postprocess(y)
+        return y
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+
+def resample_tail(df, freq, since, columns=None):
+    """
+    Bucket means of df from the bucket containing since onward.
+
+    Only the minute rows of those buckets are read, so the cost depends on
+    the size of the tail, not on the length of the history.
+    """
+    cut = pd.Timestamp(since).floor(freq)
+    tail = df.loc[cut:]
+    if columns is not None:
+        tail = tail[columns]
+    return tail.resample(freq).mean()
+
+
+def splice(frame, tail, cut):
+    """frame with every row from cut onward replaced by tail."""
+    return pd.concat([frame[frame.index < cut], tail[tail.index >= cut]])
+
+
+def tail_window(frame, cut, lookback):
+    """Rows of frame from lookback rows before cut to the end."""
+    pos = frame.index.searchsorted(cut)
+    return frame.iloc[max(pos - lookback, 0):]
+
+
+def interpolate_tail(series, cut):
+    """Linear interpolation of series from the last valid value before cut."""
+    before = series[series.index < cut].dropna()
+    start = before.index[-1] if len(before) else series.index[0]
+    series = series.copy()
+    series[series.index >= start] = series[series.index >= start].interpolate()
+    return series
+
+
+def power_factor(frame):
+    pf = frame["Global_active_power"] / np.sqrt(
+        frame["Global_active_power"] ** 2 + frame["Global_reactive_power"] ** 2
+    )
+    return pf.replace([np.inf, -np.inf], np.nan)
+
+
+def numeric_columns(df):
+    return [col for col, dtype in df.dtypes.items() if pd.api.types.is_numeric_dtype(dtype)]
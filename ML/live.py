@@ -0,0 +1,250 @@
+"""
+Live monitoring: rolling statistics and alerts over a stream of minute
+readings, fanned out to any number of stream subscribers.
+
+One producer feeds the stream (ingested readings, or a replay of the
+stored data; ingested readings are not streamed while a replay runs) and
+every message is encoded once, whatever the number of subscribers.
+"""
+import asyncio
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import serialize
+from metrics import timed
+
+LIVE_CHANNELS = ["Global_active_power", "Voltage", "Sub_metering_1", "Sub_metering_2", "Sub_metering_3"]
+
+
+class RollingWindow:
+    """
+    Count, mean, standard deviation, min and max of the last size readings,
+    updated in O(1) amortized per reading.
+
+    Sums are kept running; min and max are the heads of monotonic deques of
+    (position, value). A NaN reading takes its slot in the window but adds
+    no value.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._values = deque()
+        self._min = deque()
+        self._max = deque()
+        self._pos = 0
+        self.count = 0
+        self.sum = 0.0
+        self.sum_sq = 0.0
+
+    def push(self, value):
+        pos = self._pos
+        self._pos += 1
+        self._values.append(value)
+        if len(self._values) > self.size:
+            old = self._values.popleft()
+            if not math.isnan(old):
+                self.count -= 1
+                self.sum -= old
+                self.sum_sq -= old * old
+
+        if not math.isnan(value):
+            self.count += 1
+            self.sum += value
+            self.sum_sq += value * value
+            while self._min and self._min[-1][1] >= value:
+                self._min.pop()
+            self._min.append((pos, value))
+            while self._max and self._max[-1][1] <= value:
+                self._max.pop()
+            self._max.append((pos, value))
+
+        # Drop extremes that slid out of the window
+        first = pos - self.size + 1
+        while self._min and self._min[0][0] < first:
+            self._min.popleft()
+        while self._max and self._max[0][0] < first:
+            self._max.popleft()
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    @property
+    def std(self):
+        if not self.count:
+            return None
+        return math.sqrt(max(self.sum_sq / self.count - self.mean ** 2, 0.0))
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else None
+
+
+class LiveMonitor:
+    """
+    Rolling windows per channel plus the alerts raised by each reading.
+
+    window: readings (minutes) in the rolling statistics
+    voltage_range: (low, high) volts outside which a voltage alert is raised
+    spike_sigma, spike_min_kw: a consumption spike is active power above the
+        window mean by spike_sigma standard deviations and spike_min_kw kW,
+        checked once the window holds at least half its readings
+    """
+
+    def __init__(self, window=60, voltage_range=(230.0, 250.0), spike_sigma=3.0, spike_min_kw=1.0):
+        self.windows = {channel: RollingWindow(window) for channel in LIVE_CHANNELS}
+        self.voltage_range = voltage_range
+        self.spike_sigma = spike_sigma
+        self.spike_min_kw = spike_min_kw
+        self.day = None
+        self.today_kwh = 0.0
+
+    def _alerts(self, values):
+        alerts = []
+        voltage = values["Voltage"]
+        low, high = self.voltage_range
+        if not math.isnan(voltage) and not low <= voltage <= high:
+            alerts.append({"type": "voltage", "value": voltage, "message": f"Unstable Voltage: {voltage:.1f} V"})
+
+        # Compared with the window before this reading joins it
+        power = values["Global_active_power"]
+        window = self.windows["Global_active_power"]
+        if not math.isnan(power) and window.count >= window.size // 2:
+            excess = power - window.mean
+            if excess > self.spike_min_kw and excess > self.spike_sigma * window.std:
+                alerts.append({
+                    "type": "spike", "value": power,
+                    "message": f"Consumption spike: {power:.2f} kW against a {window.mean:.2f} kW rolling mean",
+                })
+        return alerts
+
+    def process(self, time, values):
+        """Message for one reading: time, values by channel, window statistics and alerts."""
+        values = dict(zip(LIVE_CHANNELS, (float(v) for v in values)))
+        alerts = self._alerts(values)
+
+        day = time.normalize()
+        if day != self.day:
+            self.day, self.today_kwh = day, 0.0
+        if not math.isnan(values["Global_active_power"]):
+            self.today_kwh += values["Global_active_power"] / 60
+
+        stats = {}
+        for channel, window in self.windows.items():
+            window.push(values[channel])
+            stats[channel] = {"mean": window.mean, "min": window.min, "max": window.max}
+
+        return {
+            "time": time.isoformat(),
+            "values": {channel: None if math.isnan(v) else v for channel, v in values.items()},
+            "window": stats,
+            "today_kwh": self.today_kwh,
+            "alerts": alerts,
+        }
+
+
+class Broadcaster:
+    """
+    Fan-out of encoded messages to subscriber queues, on the event loop.
+
+    A subscriber that falls queue_size messages behind loses its oldest
+    ones, so a slow client never holds up the producer or the others.
+    """
+
+    def __init__(self, queue_size=256):
+        self.queue_size = queue_size
+        self._subscribers = set()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, message):
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+
+class LiveFeed:
+    """The single producer: readings go through the monitor, then to every subscriber."""
+
+    def __init__(self, monitor, broadcaster):
+        self.monitor = monitor
+        self.broadcaster = broadcaster
+        self.latest = None
+        self._replay = None
+        self._lock = threading.Lock()
+
+    def encode(self, frame, limit=None):
+        """
+        Messages for the minute rows of frame, in time order; safe off the
+        event loop. Every row goes through the monitor, but only the last
+        limit are encoded: a subscriber queue would drop the older ones.
+        """
+        values = frame.reindex(columns=LIVE_CHANNELS).to_numpy(dtype=np.float64)
+        first = 0 if limit is None else max(len(values) - limit, 0)
+        messages = []
+        with self._lock:
+            for i, (time, row) in enumerate(zip(frame.index, values)):
+                message = self.monitor.process(time, row)
+                if i >= first:
+                    messages.append(serialize.dumps(message).decode())
+        return messages
+
+    def send(self, messages):
+        """Fan encoded messages out to every subscriber; call on the event loop."""
+        for message in messages:
+            self.latest = message
+            self.broadcaster.publish(message)
+
+    @timed("live.publish")
+    def publish(self, frame):
+        """Stream the minute rows of frame, in time order; call on the event loop."""
+        self.send(self.encode(frame))
+
+    @property
+    def replaying(self):
+        return self._replay is not None and not self._replay.done()
+
+    def start_replay(self, get_store, speed, start=None):
+        """
+        Replay the stored minutes at speed minutes per second (0 stops),
+        from start (default: the first stored minute), looping at the end.
+        get_store returns the TimeSeriesStore; it runs in a thread, as it
+        may have to load the data first.
+        """
+        if self.replaying:
+            self._replay.cancel()
+        self._replay = None
+        if speed > 0:
+            self._replay = asyncio.get_running_loop().create_task(self._run_replay(get_store, speed, start))
+
+    async def _run_replay(self, get_store, speed, start):
+        store = await asyncio.to_thread(get_store)
+        # Ticks of at least 0.1 s; faster replays send several minutes per tick
+        interval = max(1.0 / speed, 0.1)
+        per_tick = max(int(round(speed * interval)), 1)
+        pos = store.df.index.searchsorted(pd.Timestamp(start)) if start else 0
+        while True:
+            df = store.df
+            if pos >= len(df):
+                pos = 0
+            self.publish(df.iloc[pos:pos + per_tick])
+            pos += per_tick
+            await asyncio.sleep(interval)
@@ -1,24 +1,325 @@
+import atexit
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
 import pandas as pd
 
-def load_data(path):
-  
-    df = pd.read_excel(path)
+from metrics import timed
 
-    df['datetime'] = pd.to_datetime(df['Date'] + " " + df['Time'], dayfirst=True)
+CACHE_VERSION = 2
 
 
-    df = df.set_index('datetime')
+def _cache_dir(path):
+    return os.path.splitext(path)[0] + "_cache"
 
-    start = "2007-01-01"
-    end = "2007-12-31"
-    df = df.loc[start:end]
 
-    # Convert numeric columns
-    df['Global_active_power'] = pd.to_numeric(df['Global_active_power'], errors='coerce')
-    df['kwh'] = df['Global_active_power'] / 60  # kW-min → kWh
+def _fingerprint(path):
+    stat = os.stat(path)
+    return {"version": CACHE_VERSION, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _parse_unique(values, parse, missing):
+    # Parse each distinct value once and scatter the results back; code -1
+    # (a missing value) picks the appended missing marker
+    codes, uniques = pd.factorize(np.asarray(values))
+    parsed = np.append(parse(uniques), missing)
+    return parsed[codes]
+
+
+def parse_datetime(date, time):
+    """
+    Timestamps from the dataset's Date ('16/12/2006') and Time ('17:24:00') columns.
+
+    Dates are parsed with the fixed day-first format and times as durations,
+    each distinct value only once (a year of minute data has 365 dates and
+    1440 times), then added as datetime64/timedelta64 arrays. No
+    concatenated "Date Time" strings are built.
+    """
+    dates = _parse_unique(
+        date,
+        lambda u: pd.to_datetime(u, format='%d/%m/%Y').values.astype('datetime64[ns]'),
+        np.datetime64('NaT', 'ns'),
+    )
+    times = _parse_unique(
+        time,
+        lambda u: pd.to_timedelta(u.astype(str)).values.astype('timedelta64[ns]'),
+        np.timedelta64('NaT', 'ns'),
+    )
+    return pd.DatetimeIndex(dates + times, name='datetime')
+
+
+# Rows parsed per block: bounds the memory of a source parse, whatever its length
+BLOCK_ROWS = 100_000
+
+HOUR_NS = 3600 * 10**9
+DAY_NS = 24 * HOUR_NS
+# Bucket width of each rollup kept in the cache bundle
+ROLLUPS = {"h": HOUR_NS, "D": DAY_NS}
+
+
+def _excel_blocks(path, block_rows):
+    # read_only streams the sheet row by row instead of building it in memory
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(name) for name in next(rows)]
+        block = []
+        for row in rows:
+            block.append(row)
+            if len(block) == block_rows:
+                yield pd.DataFrame(block, columns=header)
+                block = []
+        if block:
+            yield pd.DataFrame(block, columns=header)
+    finally:
+        workbook.close()
+
+
+def _read_blocks(path, block_rows=BLOCK_ROWS):
+    """
+    The source file as frames of at most block_rows rows, each with a
+    DatetimeIndex and float32 measurement columns.
+    """
+    if path.endswith(('.txt', '.csv')):
+        # The original UCI layout: ';'-separated with '?' for missing values
+        raw_blocks = pd.read_csv(
+            path, sep=';', na_values=['?'], dtype={'Date': str, 'Time': str}, chunksize=block_rows,
+        )
+    else:
+        raw_blocks = _excel_blocks(path, block_rows)
+
+    for df in raw_blocks:
+        df.index = parse_datetime(df.pop('Date'), df.pop('Time'))
+        # Store every measurement as float32, unparseable cells become NaN
+        for col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float32)
+        yield df
+
+
+class _Rollup:
+    """Sums and non-null counts per fixed-width bucket, accumulated block by block."""
+
+    def __init__(self, step):
+        self.step = step
+        self.index, self.sums, self.counts = [], [], []
+
+    def add(self, index, values):
+        keep = index != np.iinfo(np.int64).min  # NaT rows have no bucket
+        keys = index[keep] // self.step
+        values = values[keep].astype(np.float64)
+        if not len(keys):
+            return
+        valid = ~np.isnan(values)
+
+        # Rows are in time order: every bucket is one run of equal keys
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        sums = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0)
+        counts = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+        keys = keys[starts]
+
+        # A bucket cut by the block boundary continues the previous block's last one
+        if self.index and self.index[-1][-1] == keys[0]:
+            self.sums[-1][-1] += sums[0]
+            self.counts[-1][-1] += counts[0]
+            keys, sums, counts = keys[1:], sums[1:], counts[1:]
+            if not len(keys):
+                return
+        self.index.append(keys)
+        self.sums.append(sums)
+        self.counts.append(counts)
+
+    def arrays(self, width):
+        if not self.index:
+            return np.empty(0, dtype=np.int64), np.zeros((0, width)), np.zeros((0, width), dtype=np.int64)
+        return np.concatenate(self.index) * self.step, np.concatenate(self.sums), np.concatenate(self.counts)
+
+
+def _save_npy(path, array):
+    # Write to a temp file first so a concurrent reader never sees half a file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+@timed("load.parse_source")
+def _write_cache(path, cache_dir, fingerprint, block_rows=BLOCK_ROWS):
+    """
+    Stream the source into the bundle: the index and every column are
+    appended block by block to raw files, and the hourly and daily rollups
+    are accumulated on the way. Returns the bundle's meta.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f".{os.getpid()}.tmp"
+    rollups = {freq: _Rollup(step) for freq, step in ROLLUPS.items()}
+    columns, files, rows = None, [], 0
+    try:
+        for df in _read_blocks(path, block_rows):
+            if columns is None:
+                columns = list(df.columns)
+                names = ["index.bin"] + [f"col_{i}.bin" for i in range(len(columns))]
+                files = [open(os.path.join(cache_dir, name + tmp), "wb") for name in names]
+
+            index = df.index.values.astype('datetime64[ns]').view(np.int64)
+            values = df.to_numpy(dtype=np.float32)
+            index.tofile(files[0])
+            for i, f in enumerate(files[1:]):
+                np.ascontiguousarray(values[:, i]).tofile(f)
+            for rollup in rollups.values():
+                rollup.add(index, values)
+            rows += len(df)
+    finally:
+        for f in files:
+            f.close()
+
+    if columns is None:
+        raise ValueError(f"{path} holds no rows")
+    for f in files:
+        os.replace(f.name, f.name[:-len(tmp)])
+    for freq, rollup in rollups.items():
+        for name, array in zip(("index", "sums", "counts"), rollup.arrays(len(columns))):
+            _save_npy(os.path.join(cache_dir, f"rollup_{freq}_{name}.npy"), array)
+
+    # meta.json is written last: its presence marks the bundle as complete
+    meta = dict(fingerprint, columns=columns, rows=rows)
+    with open(os.path.join(cache_dir, "meta.json" + tmp), "w") as f:
+        json.dump(meta, f)
+    os.replace(os.path.join(cache_dir, "meta.json" + tmp), os.path.join(cache_dir, "meta.json"))
+    return meta
+
 
-    df['Sub_metering_1'] = pd.to_numeric(df['Sub_metering_1'], errors='coerce') / 1000
-    df['Sub_metering_2'] = pd.to_numeric(df['Sub_metering_2'], errors='coerce') / 1000
-    df['Sub_metering_3'] = pd.to_numeric(df['Sub_metering_3'], errors='coerce') / 1000
+def _read_meta(cache_dir, fingerprint):
+    try:
+        with open(os.path.join(cache_dir, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
 
+    if any(meta.get(k) != v for k, v in fingerprint.items()):
+        return None
+    return meta
+
+
+def _bundle(path):
+    """Directory and meta of an up-to-date cache bundle, streaming the source into it if needed."""
+    cache_dir = _cache_dir(path)
+    fingerprint = _fingerprint(path)
+
+    meta = _read_meta(cache_dir, fingerprint)
+    if meta is not None:
+        return cache_dir, meta
+
+    try:
+        return cache_dir, _write_cache(path, cache_dir, fingerprint)
+    except OSError as e:
+        # The bundle is still needed to keep memory bounded: build it in a
+        # temporary directory for this process instead
+        tmp_dir = tempfile.mkdtemp(prefix="ml_data_cache_")
+        atexit.register(shutil.rmtree, tmp_dir, True)
+        print(f"Could not write data cache to {cache_dir} ({e}), using {tmp_dir}")
+        return tmp_dir, _write_cache(path, tmp_dir, fingerprint)
+
+
+def _memmap(path, dtype, rows):
+    # mmap cannot map an empty file
+    return np.memmap(path, dtype=dtype, mode='r', shape=(rows,)) if rows else np.empty(0, dtype=dtype)
+
+
+@timed("load.read_cache")
+def _read_cache(cache_dir, meta):
+    rows = meta["rows"]
+    index = _memmap(os.path.join(cache_dir, "index.bin"), np.int64, rows)
+    columns = {
+        col: _memmap(os.path.join(cache_dir, f"col_{i}.bin"), np.float32, rows)
+        for i, col in enumerate(meta["columns"])
+    }
+    index = pd.DatetimeIndex(index.view('datetime64[ns]'), name='datetime')
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def load_cached(path):
+    """
+    Parsed source frame, served from the bundle next to the source file.
+
+    The bundle holds the DatetimeIndex and the float32 measurement columns as
+    raw arrays, memory-mapped on load, so only the rows actually read are
+    paged in. It is rebuilt when the source mtime or size changes; the source
+    is streamed in blocks of BLOCK_ROWS rows, so a parse of any length of
+    history needs the memory of one block.
+    """
+    return _read_cache(*_bundle(path))
+
+
+def load_rollup(path, freq="h"):
+    """
+    Sums and non-null counts per hour ("h") or day ("D") of the whole source,
+    as two frames indexed by bucket start, with the derived columns of
+    load_data (kwh, sub-meters in kWh). Buckets without rows are left out.
+    """
+    cache_dir, meta = _bundle(path)
+    arrays = [np.load(os.path.join(cache_dir, f"rollup_{freq}_{name}.npy")) for name in ("index", "sums", "counts")]
+    index = pd.DatetimeIndex(arrays[0].view('datetime64[ns]'), name='datetime')
+    sums = _derive_columns(pd.DataFrame(arrays[1], index=index, columns=meta["columns"]))
+    counts = pd.DataFrame(arrays[2], index=index, columns=meta["columns"])
+    counts['kwh'] = counts['Global_active_power']
+    return sums, counts
+
+
+DERIVED_COLUMNS = ['kwh']
+
+
+def _derive_columns(df):
+    df['kwh'] = df['Global_active_power'] / 60  # kW-min → kWh
+
+    df['Sub_metering_1'] = df['Sub_metering_1'] / 1000
+    df['Sub_metering_2'] = df['Sub_metering_2'] / 1000
+    df['Sub_metering_3'] = df['Sub_metering_3'] / 1000
     return df
+
+
+# Window of minute data the service keeps (inclusive dates); set
+# ML_DATA_START/ML_DATA_END to another range, or to "" for open-ended
+DEFAULT_START = os.environ.get("ML_DATA_START", "2007-01-01") or None
+DEFAULT_END = os.environ.get("ML_DATA_END", "2007-12-31") or None
+
+
+@timed("load.load_data")
+def load_data(path, start=DEFAULT_START, end=DEFAULT_END):
+    """
+    Minute data between start and end (inclusive dates, None for open-ended).
+
+    Only the window is read from the memory-mapped bundle; history outside
+    it is available per hour or day through load_rollup().
+    """
+    df = load_cached(path)
+
+    df = df.loc[start:end]
+
+    return _derive_columns(df)
+
+
+def readings_to_frame(readings, columns):
+    """
+    Minute frame for newly ingested readings, in the same layout as load_data().
+
+    readings: list of dicts with a 'datetime' key and raw meter values
+        (sub-meters in Wh, as in the source file); missing values become NaN.
+    columns: columns of the existing frame; derived ones are recomputed.
+    Raises ValueError for a datetime that is not a naive timestamp.
+    """
+    columns = [c for c in columns if c not in DERIVED_COLUMNS]
+    df = pd.DataFrame(readings)
+    try:
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop('datetime')), name='datetime').astype('datetime64[ns]')
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"invalid reading datetime: {e}") from e
+    df = df.reindex(columns=columns)
+    for col in df.columns:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float32)
+
+    return _derive_columns(df.sort_index())
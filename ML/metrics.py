@@ -0,0 +1,142 @@
+"""
+Latency histograms for the hot paths, rendered in the Prometheus text format.
+
+    @timed("EnergyPredictor.fit")
+    def _train_model(self): ...
+
+    with timed("rollup.totals"):
+        ...
+
+Set ML_METRICS=0 to turn it off: timed() then returns the function itself
+when used as a decorator and a shared no-op context manager otherwise.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+ENABLED = os.environ.get("ML_METRICS", "1").lower() not in ("0", "false", "off", "no")
+
+# Upper bounds in seconds, from sub-millisecond slices to full model fits
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        slot = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[slot] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class Family:
+    """Histograms of one metric name, one per value of its single label."""
+
+    def __init__(self, name, help, label):
+        self.name = name
+        self.help = help
+        self.label = label
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, value):
+        child = self._children.get(value)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(value, Histogram())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for value, histogram in sorted(self._children.items()):
+            counts, total, count = histogram.snapshot()
+            label = f'{self.label}="{value}"'
+            cumulative = 0
+            for bound, n in zip(histogram.buckets, counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label}}} {total}")
+            lines.append(f"{self.name}_count{{{label}}} {count}")
+        return "\n".join(lines)
+
+
+STAGES = Family("ml_stage_seconds", "Time spent in each stage of loading, training and forecasting.", "stage")
+REQUESTS = Family("ml_request_seconds", "End-to-end request latency per route.", "route")
+
+
+class _Stage:
+    """What timed() returns when enabled: a decorator, or a one-use context manager."""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __call__(self, func):
+        histogram = self.histogram
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _Disabled:
+    __slots__ = ()
+
+    def __call__(self, func):
+        return func
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_DISABLED = _Disabled()
+
+
+def timed(stage):
+    """Time a function (as a decorator) or a block (as a context manager) under stage."""
+    if not ENABLED:
+        return _DISABLED
+    return _Stage(STAGES.labels(stage))
+
+
+def observe(stage, seconds, family=STAGES):
+    """Record an already measured duration."""
+    if ENABLED:
+        family.labels(stage).observe(seconds)
+
+
+def render():
+    if not ENABLED:
+        return "# metrics disabled (ML_METRICS=0)\n"
+    return "\n".join(family.render() for family in (STAGES, REQUESTS)) + "\n"
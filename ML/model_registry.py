@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+
+import joblib
+import pandas as pd
+
+
+def artifact_key(predictor):
+    """
+    Version of a predictor's models: a hash of its training data (range, size
+    and content), its hyperparameters, forecasting strategy and estimator backend.
+    """
+    frame = predictor.training_frame()
+    spec = {
+        "predictor": type(predictor).__name__,
+        "params": predictor.PARAMS,
+        "start": str(frame.index[0]) if len(frame) else None,
+        "end": str(frame.index[-1]) if len(frame) else None,
+        "rows": len(frame),
+        "content": int(pd.util.hash_pandas_object(frame).sum()),
+    }
+    # Only non-default options enter the key, so existing artifacts keep theirs
+    for option, default in (("strategy", "recursive"), ("backend", "forest")):
+        value = getattr(predictor, option, default)
+        if value != default:
+            spec[option] = value
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class ModelRegistry:
+    """
+    Fitted estimators stored with joblib under root/<Predictor>/<key>/.
+
+    Artifacts are saved uncompressed so their arrays can be memory-mapped on
+    load. meta.json is written last and marks an artifact set as complete.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, predictor, key=None):
+        return os.path.join(self.root, type(predictor).__name__, key or artifact_key(predictor))
+
+    def has(self, predictor):
+        return os.path.exists(os.path.join(self.path(predictor), "meta.json"))
+
+    def save(self, predictor, attrs=None, key=None):
+        """
+        Save the fitted models of predictor (all of predictor.MODELS by
+        default) under key (default: the key of its current data).
+        """
+        key = key or artifact_key(predictor)
+        path = self.path(predictor, key)
+        os.makedirs(path, exist_ok=True)
+
+        for attr in attrs or predictor.MODELS:
+            # Written under a temporary name, another process may be saving the sibling models
+            target = os.path.join(path, f"{attr}.joblib")
+            tmp = f"{target}.{os.getpid()}.tmp"
+            joblib.dump(getattr(predictor, attr), tmp)
+            os.replace(tmp, target)
+
+        # Only mark complete once every model of the predictor is on disk
+        if all(os.path.exists(os.path.join(path, f"{attr}.joblib")) for attr in predictor.MODELS):
+            meta = {"key": key, "models": list(predictor.MODELS), "params": predictor.PARAMS}
+            tmp = os.path.join(path, f"meta.json.{os.getpid()}.tmp")
+            with open(tmp, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp, os.path.join(path, "meta.json"))
+
+        predictor.model_version = key
+        return key
+
+    def load(self, predictor):
+        """Attach saved models to predictor; returns False if none match its data."""
+        key = artifact_key(predictor)
+        path = self.path(predictor, key)
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            return False
+
+        for attr in predictor.MODELS:
+            setattr(predictor, attr, joblib.load(os.path.join(path, f"{attr}.joblib"), mmap_mode="r"))
+        predictor.model_version = key
+        return True
+
+    def load_or_train(self, predictor):
+        """Load predictor's models, training and saving them if none are stored."""
+        if not self.load(predictor):
+            name = type(predictor).__name__
+            print(f"No saved model for {name}, training it now (run train_models.py to prebuild).")
+            predictor._train_model()
+            self.save(predictor)
+        return predictor
@@ -1,21 +1,52 @@
 # predictor.py
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error
+from estimators import BACKENDS, compile_forest, fit_estimator
+from forecaster import QUANTILES, DirectForecaster, RecursiveForecaster, direct_targets, path_quantiles
+from incremental import splice, tail_window
+from metrics import timed
+
+def daily_calendar(times):
+    return {'day_of_week': times.weekday, 'month': times.month}
+
+def hourly_calendar(times):
+    return {'hour': times.hour, 'day': times.day, 'weekday': times.weekday, 'month': times.month}
 
 class EnergyPredictor:
-    def __init__(self, df):
-       
-        self.df = df.copy()
+    LAGS = [f'lag_{lag}' for lag in range(1, 8)]
+    PARAMS = {'n_estimators': 300, 'random_state': 42}
+    MODELS = ('model',)
+    # Incremental refresh (see refresh.py): new trees per refresh, fitted on the last window days
+    REFRESH = {'trees': 30, 'window': 90}
+
+    def __init__(self, store, train=True, backend='forest'):
+        """
+        store: TimeSeriesStore holding the minute data
+        train=False only prepares the features; the model is then expected
+        to come from a ModelRegistry.
+        backend: estimator to fit, one of estimators.BACKENDS
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}")
+        self.store = store
+        self.backend = backend
         self.daily_df = None
         self.model = None
+        self.model_version = None
+        self.feature_names = None
         self._prepare_data()
-        self._train_model()
+        if train:
+            self._train_model()
 
+    @timed("EnergyPredictor.prepare")
     def _prepare_data(self):
-        # Resample to daily mean
-        daily_df = self.df['Global_active_power'].resample('D').mean().to_frame()
+        # Daily mean, shared by the store
+        self.daily_df = self._build_features(self.store.daily[['Global_active_power']])
+        self.feature_names = [c for c in self.daily_df.columns if c not in ('Global_active_power', 'Daily_energy_kWh')]
+
+    def _build_features(self, daily_mean):
+        daily_df = daily_mean.copy()
         daily_df['Daily_energy_kWh'] = daily_df['Global_active_power'] * 24
 
         # Feature engineering
@@ -24,76 +55,118 @@ class EnergyPredictor:
         for lag in range(1, 8):
             daily_df[f'lag_{lag}'] = daily_df['Daily_energy_kWh'].shift(lag)
 
-        daily_df.dropna(inplace=True)
-        self.daily_df = daily_df
+        return daily_df.dropna()
+
+    @timed("EnergyPredictor.update")
+    def update(self, since):
+        """
+        Take in minute rows appended to the store from since onward.
 
-    def _train_model(self):
-        X = self.daily_df.drop(['Global_active_power','Daily_energy_kWh'], axis=1)
-        y = self.daily_df['Daily_energy_kWh']
+        Only the rows from since's day on get new lag features.
+        """
+        cut = pd.Timestamp(since).floor('D')
+        daily_mean = self.store.daily[['Global_active_power']]
+        features = self._build_features(tail_window(daily_mean, cut, len(self.LAGS)))
+        self.daily_df = splice(self.daily_df, features, cut)
+
+    def training_frame(self):
+        return self.daily_df
+
+    def training_sets(self):
+        """(X, y) arrays per model attribute, in time order."""
+        # Plain arrays, so forecasting can feed ndarrays without pandas
+        X = self.daily_df[self.feature_names].to_numpy()
+        return {'model': (X, self.daily_df['Daily_energy_kWh'].to_numpy())}
+
+    @timed("EnergyPredictor.fit")
+    def _train_model(self, n_jobs=None):
+        X, y = self.training_sets()['model']
 
         split = int(len(X) * 0.8)
-        X_train, X_test = X.iloc[:split], X.iloc[split:]
-        y_train, y_test = y.iloc[:split], y.iloc[split:]
+        X_train, X_test = X[:split], X[split:]
+        y_train, y_test = y[:split], y[split:]
 
-        model = RandomForestRegressor(n_estimators=300, random_state=42)
-        model.fit(X_train, y_train)
+        model = fit_estimator(self.backend, self.PARAMS, X_train, y_train, n_jobs)
 
         y_pred = model.predict(X_test)
-        mae = mean_absolute_error(y_test, y_pred)
-        print("MAE (kWh/day):", mae)
+        self.holdout_mae = mean_absolute_error(y_test, y_pred)
+        print("MAE (kWh/day):", self.holdout_mae)
 
         self.model = model
 
-    def predict_next_7_days(self, start_date=None):
+    def _forecaster(self):
+        return RecursiveForecaster([self.model], self.feature_names, self.LAGS, daily_calendar)
+
+    def _origin_rows(self, start_dates):
+        """Last daily row at or before each start date (None means the last row)."""
+        df = self.daily_df
+        pos = np.full(len(start_dates), len(df) - 1)
+        given = [i for i, d in enumerate(start_dates) if d]
+        if given:
+            start_dts = pd.to_datetime([start_dates[i] for i in given])
+            if (start_dts > df.index[-1]).any():
+                raise ValueError("start_date is beyond the last available data")
+            found = df.index.searchsorted(start_dts, side='right') - 1
+            if (found < 0).any():
+                raise ValueError("start_date is before the first available data")
+            pos[given] = found
+        return df.iloc[pos]
+
+    def origin(self, start_date=None):
+        """Timestamp of the daily row a forecast from start_date starts at."""
+        return self._origin_rows([start_date]).index[0]
+
+    @timed("EnergyPredictor.forecast")
+    def predict_next_7_days_batch(self, start_dates, intervals=False):
         """
-        Predict next 7 days starting from the last row or a given start_date.
+        Forecast 7 days from several origins at once.
 
-        start_date: str or pd.Timestamp, optional
-            If provided, forecast starts from this date.
+        All origins advance through the recursion together, so each forecast
+        day costs one model.predict on an (N, features) matrix.
+
+        start_dates: list of str / pd.Timestamp / None
+            None forecasts from the last available row.
+        intervals: also return the p10/p50/p90 of the trees' own recursive
+            paths (forest backends only, ValueError otherwise)
+        Returns a list of forecast DataFrames (Date, Predicted_Daily_Energy_kWh
+        and with intervals p10, p50, p90).
         """
         if self.model is None:
             raise ValueError("Model is not trained yet.")
 
-        df = self.daily_df.copy()
-
-        # Determine starting point
-        if start_date:
-            start_dt = pd.to_datetime(start_date)
-            if start_dt > df.index[-1]:
-                raise ValueError("start_date is beyond the last available data")
-            last_row = df[df.index <= start_dt].iloc[-1:].copy()
-        else:
-            last_row = df.iloc[-1:].copy()
-
-        future_predictions = []
-        future_dates = []
-
-        for i in range(1, 8):
-            next_date = last_row.index[0] + pd.Timedelta(days=i)
-            future_dates.append(next_date)
-
-            new_row = last_row.copy()
-            # Update lag features
-            for lag in range(1, 8):
-                if lag == 1:
-                    new_row[f'lag_{lag}'] = last_row['Daily_energy_kWh'].values[0]
-                else:
-                    new_row[f'lag_{lag}'] = last_row[f'lag_{lag-1}'].values[0]
-
-            new_row['day_of_week'] = next_date.weekday()
-            new_row['month'] = next_date.month
-
-            pred_features = new_row.drop(['Global_active_power','Daily_energy_kWh'], axis=1)
-            pred = self.model.predict(pred_features)[0]
-            future_predictions.append(pred)
-
-            new_row['Daily_energy_kWh'] = pred
-            last_row = new_row.copy()
+        rows = self._origin_rows(list(start_dates))
+
+        # Each day's energy becomes lag_1 of its first forecast day
+        lags = np.column_stack([rows['Daily_energy_kWh']] + [rows[name] for name in self.LAGS[:-1]])
+        steps = pd.to_timedelta(np.arange(1, 8), unit='D').values
+        future_dates = rows.index.values[:, None] + steps[None, :]
+        forecaster = self._forecaster()
+        predictions = forecaster.forecast_batch(lags, future_dates)[:, :, 0]
+
+        forecasts = [
+            pd.DataFrame({
+                'Date': pd.DatetimeIndex(dates),
+                'Predicted_Daily_Energy_kWh': preds
+            })
+            for dates, preds in zip(future_dates, predictions)
+        ]
+        if intervals:
+            bands = path_quantiles(forecaster.forecast_paths(compile_forest(self.model), lags, future_dates))
+            for forecast_df, band in zip(forecasts, bands):
+                for j, q in enumerate(QUANTILES):
+                    forecast_df[f'p{q}'] = band[:, j]
+        return forecasts
+
+    def predict_next_7_days(self, start_date=None, intervals=False):
+        """
+        Predict next 7 days starting from the last row or a given start_date.
 
-        forecast_df = pd.DataFrame({
-            'Date': future_dates,
-            'Predicted_Daily_Energy_kWh': future_predictions
-        })
+        start_date: str or pd.Timestamp, optional
+            If provided, forecast starts from this date.
+        intervals: add p10/p50/p90 columns (see predict_next_7_days_batch)
+        """
+        forecast_df = self.predict_next_7_days_batch([start_date], intervals)[0]
+        future_predictions = forecast_df['Predicted_Daily_Energy_kWh'].to_numpy()
 
         # Summary info: lowest & highest day
         min_idx = np.argmin(future_predictions)
@@ -107,22 +180,41 @@ class EnergyPredictor:
         return forecast_summary
 
 class HourlyEnergyPredictor:
-    def __init__(self, df):
-        self.df = df.copy()
+    LAGS = [f'lag_{lag}' for lag in range(1, 25)]
+    PARAMS = {'n_estimators': 300, 'random_state': 42}
+    MODELS = ('model',)
+    HORIZON = 24
+    REFRESH = {'trees': 30, 'window': 60 * 24}
+
+    def __init__(self, store, train=True, strategy='recursive', backend='forest'):
+        """
+        strategy: 'recursive' (one step at a time, feeding predictions back) or
+        'direct' (one multi-output model predicting all HORIZON hours at once)
+        backend: estimator to fit, one of estimators.BACKENDS
+        """
+        if strategy not in ('recursive', 'direct'):
+            raise ValueError(f"unknown strategy {strategy!r}")
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}")
+        self.store = store
+        self.strategy = strategy
+        self.backend = backend
         self.hourly_df = None
         self.model = None
+        self.model_version = None
+        self.feature_names = None
         self._prepare_data()
-        self._train_model()
+        if train:
+            self._train_model()
 
+    @timed("HourlyEnergyPredictor.prepare")
     def _prepare_data(self):
-        df = self.df
-        df['datetime'] = pd.to_datetime(df['Date'] + ' ' + df['Time'], dayfirst=True)
-        df = df.set_index('datetime')
-        df['Global_active_power'] = pd.to_numeric(df['Global_active_power'], errors='coerce')
-        df = df.dropna(subset=['Global_active_power'])
-
-        # Hourly resample
-        hourly_df = df['Global_active_power'].resample('h').mean().to_frame()
+        # Hourly mean, shared by the store
+        self.hourly_df = self._build_features(self.store.hourly[['Global_active_power']])
+        self.feature_names = [c for c in self.hourly_df.columns if c not in ('Global_active_power', 'Hourly_energy_kWh')]
+
+    def _build_features(self, hourly_mean):
+        hourly_df = hourly_mean.copy()
         hourly_df['Hourly_energy_kWh'] = hourly_df['Global_active_power'] * 1
 
         # Feature engineering
@@ -135,49 +227,70 @@ class HourlyEnergyPredictor:
         for lag in range(1, 25):
             hourly_df[f'lag_{lag}'] = hourly_df['Hourly_energy_kWh'].shift(lag)
 
-        self.hourly_df = hourly_df.dropna()
+        return hourly_df.dropna()
+
+    @timed("HourlyEnergyPredictor.update")
+    def update(self, since):
+        """Take in minute rows appended to the store from since onward (tail hours only)."""
+        cut = pd.Timestamp(since).floor('h')
+        hourly_mean = self.store.hourly[['Global_active_power']]
+        features = self._build_features(tail_window(hourly_mean, cut, len(self.LAGS)))
+        self.hourly_df = splice(self.hourly_df, features, cut)
 
-    def _train_model(self):
-        X = self.hourly_df.drop(['Global_active_power', 'Hourly_energy_kWh'], axis=1)
+    def training_frame(self):
+        return self.hourly_df
+
+    def training_sets(self):
+        """(X, y) arrays per model attribute, in time order."""
+        X = self.hourly_df[self.feature_names]
         y = self.hourly_df['Hourly_energy_kWh']
+        if self.strategy == 'direct':
+            # Row t predicts hours t .. t+23, like the recursion's steps from t-1
+            y = direct_targets(y, self.HORIZON, pd.Timedelta(hours=1))
+            complete = y.notna().all(axis=1)
+            X, y = X[complete], y[complete]
+        return {'model': (X.to_numpy(), y.to_numpy())}
+
+    @timed("HourlyEnergyPredictor.fit")
+    def _train_model(self, n_jobs=None):
+        X, y = self.training_sets()['model']
 
         split = int(len(X) * 0.9)
-        X_train, X_test = X.iloc[:split], X.iloc[split:]
-        y_train, y_test = y.iloc[:split], y.iloc[split:]
+        X_train, X_test = X[:split], X[split:]
+        y_train, y_test = y[:split], y[split:]
 
-        self.model = RandomForestRegressor(n_estimators=300, random_state=42)
-        self.model.fit(X_train, y_train)
+        self.model = fit_estimator(self.backend, self.PARAMS, X_train, y_train, n_jobs)
 
         y_pred = self.model.predict(X_test)
-        print("MAE (kWh/hour):", mean_absolute_error(y_test, y_pred))
+        self.holdout_mae = mean_absolute_error(y_test, y_pred)
+        print("MAE (kWh/hour):", self.holdout_mae)
 
-    def predict_next_24_hours(self):
-        last_row = self.hourly_df.iloc[-1:].copy()
-        future_predictions = []
-        future_hours = []
+    def _forecaster(self):
+        engine = DirectForecaster if self.strategy == 'direct' else RecursiveForecaster
+        return engine([self.model], self.feature_names, self.LAGS, hourly_calendar)
 
-        for i in range(1, 25):
-            next_time = last_row.index[0] + pd.Timedelta(hours=i)
-            future_hours.append(next_time)
-
-            new_row = last_row.copy()
-            for lag in range(1, 25):
-                new_row[f'lag_{lag}'] = last_row[f'lag_{lag-1}'].values[0] if lag > 1 else last_row['Hourly_energy_kWh'].values[0]
-
-            new_row['hour'] = next_time.hour
-            new_row['day'] = next_time.day
-            new_row['weekday'] = next_time.weekday()
-            new_row['month'] = next_time.month
+    @timed("HourlyEnergyPredictor.forecast")
+    def predict_next_24_hours(self, intervals=False):
+        """
+        intervals: add p10/p50/p90 columns from every tree's own forecast
+        (propagated through the recursion; forest backends only)
+        """
+        last_row = self.hourly_df.iloc[-1]
 
-            pred = self.model.predict(new_row.drop(['Global_active_power', 'Hourly_energy_kWh'], axis=1))[0]
-            future_predictions.append(pred)
-            new_row['Hourly_energy_kWh'] = pred
-            last_row = new_row.copy()
+        lags = [last_row['Hourly_energy_kWh']] + [last_row[name] for name in self.LAGS[:-1]]
+        future_hours = last_row.name + pd.to_timedelta(np.arange(1, 25), unit='h')
+        forecaster = self._forecaster()
+        future_predictions = forecaster.forecast(lags, future_hours)[:, 0]
 
         forecast_df = pd.DataFrame({
             'Date': future_hours,
             'Predicted_Hourly_Energy_kWh': future_predictions
         })
+        if intervals:
+            paths = forecaster.forecast_paths(compile_forest(self.model), [lags], future_hours.values[None, :])
+            band = path_quantiles(paths)[0]
+            for j, q in enumerate(QUANTILES):
+                forecast_df[f'p{q}'] = band[:, j]
 
         min_idx = np.argmin(future_predictions)
         max_idx = np.argmax(future_predictions)
@@ -187,99 +300,3 @@ class HourlyEnergyPredictor:
             "lowest_hour": forecast_df.iloc[min_idx],
             "highest_hour": forecast_df.iloc[max_idx]
         }
-
-class EfficiencyForecast24H:
-    def __init__(self, df, rf_active, rf_reactive, power_hourly):
-        self.df = df
-        self.rf_active = rf_active
-        self.rf_reactive = rf_reactive
-        self.power_hourly = power_hourly
-
-    def predict_next_24h(self):
-        future_predictions = []
-
-        last_data = self.df.iloc[-1:].copy()
-
-        for i in range(24):
-
-            features = last_data[["lag_1", "lag_2", "lag_24", "lag_48", "hour", "dayofweek"]]
-
-            pred_active = self.rf_active.predict(features)[0]
-            pred_reactive = self.rf_reactive.predict(features)[0]
-
-            pf = pred_active / np.sqrt(pred_active**2 + pred_reactive**2)
-
-            future_predictions.append([pred_active, pred_reactive, pf])
-
-            # update lags
-            last_data["lag_48"] = last_data["lag_24"]
-            last_data["lag_24"] = last_data["lag_2"]
-            last_data["lag_2"] = last_data["lag_1"]
-            last_data["lag_1"] = pred_active
-
-            next_time = last_data.index[0] + pd.Timedelta(hours=1)
-            last_data.index = [next_time]
-            last_data["hour"] = next_time.hour
-            last_data["dayofweek"] = next_time.dayofweek
-
-        # Build DF
-        future_index = pd.date_range(
-            start=self.power_hourly.index[-1] + pd.Timedelta(hours=1),
-            periods=24,
-            freq="h"
-        )
-
-        forecast_df = pd.DataFrame(
-            future_predictions,
-            columns=["Active_power_pred", "Reactive_power_pred", "Power_factor_pred"],
-            index=future_index
-        )
-
-        return forecast_df
-
-class EfficiencyForecast7D:
-    def __init__(self, df, rf_active, rf_reactive, power_hourly):
-        self.df = df
-        self.rf_active = rf_active
-        self.rf_reactive = rf_reactive
-        self.power_hourly = power_hourly
-
-    def predict_next_7d(self):
-        future_predictions = []
-
-        last_data = self.df.iloc[-1:].copy()
-
-        for i in range(168):  # 7 days * 24 hours
-            features = last_data[["lag_1", "lag_2", "lag_24", "lag_48", "hour", "dayofweek"]]
-
-            pred_active = self.rf_active.predict(features)[0]
-            pred_reactive = self.rf_reactive.predict(features)[0]
-
-            pf = pred_active / np.sqrt(pred_active**2 + pred_reactive**2)
-
-            future_predictions.append([pred_active, pred_reactive, pf])
-
-            # update lag features
-            last_data["lag_48"] = last_data["lag_24"]
-            last_data["lag_24"] = last_data["lag_2"]
-            last_data["lag_2"] = last_data["lag_1"]
-            last_data["lag_1"] = pred_active
-
-            next_time = last_data.index[0] + pd.Timedelta(hours=1)
-            last_data.index = [next_time]
-            last_data["hour"] = next_time.hour
-            last_data["dayofweek"] = next_time.dayofweek
-
-        future_index = pd.date_range(
-            start=self.power_hourly.index[-1] + pd.Timedelta(hours=1),
-            periods=168,
-            freq="h"
-        )
-
-        forecast_df = pd.DataFrame(
-            future_predictions,
-            columns=["Active_power_pred", "Reactive_power_pred", "Power_factor_pred"],
-            index=future_index
-        )
-
-        return forecast_df
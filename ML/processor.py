@@ -1,19 +1,106 @@
 import numpy as np
+import pandas as pd
 
-def aggregate_week(week_df):
- 
-    total_active_power_kwh = week_df['Global_active_power'].sum() / 60
-    P_sum = week_df['Global_active_power'].sum()
-    Q_sum = week_df['Global_reactive_power'].sum()
+def aggregate_week(rollup, start, end):
+    """
+    Weekly summary for rows in [start, end] (inclusive), read from a RollupStore.
+    """
+    sums, counts = rollup.totals(start, end)
+
+    total_active_power_kwh = sums['Global_active_power'] / 60
+    P_sum = sums['Global_active_power']
+    Q_sum = sums['Global_reactive_power']
     efficiency = P_sum / np.sqrt(P_sum**2 + Q_sum**2) if (P_sum**2 + Q_sum**2) > 0 else 0
-    sub_meter_total = week_df['Sub_metering_1'].sum() + week_df['Sub_metering_2'].sum() + week_df['Sub_metering_3'].sum()
+    sub_meter_total = sums['Sub_metering_1'] + sums['Sub_metering_2'] + sums['Sub_metering_3']
     sub_meter_avg = sub_meter_total / 7
+    n_active = counts['Global_active_power']
     return {
         "total_active_power_kwh": total_active_power_kwh,
-        "avg_active_power_kw": week_df['Global_active_power'].mean(),
-        "sub_metering_1": week_df['Sub_metering_1'].sum(),
-        "sub_metering_2": week_df['Sub_metering_2'].sum(),
-        "sub_metering_3": week_df['Sub_metering_3'].sum(),
+        "avg_active_power_kw": P_sum / n_active if n_active else float('nan'),
+        "sub_metering_1": sums['Sub_metering_1'],
+        "sub_metering_2": sums['Sub_metering_2'],
+        "sub_metering_3": sums['Sub_metering_3'],
         "sub_metering_avg": sub_meter_avg,
         "efficiency": efficiency
     }
+
+
+# Bucket frequency of each /aggregate granularity, with its nominal width in ns
+GRANULARITIES = {
+    "minute": ("min", 60 * 10**9),
+    "hour": ("h", 3600 * 10**9),
+    "day": ("D", 86400 * 10**9),
+    "week": ("W", 7 * 86400 * 10**9),
+    "month": ("M", 2629746 * 10**9),
+}
+
+
+def _mean(column):
+    def mean(sums, counts):
+        return sums[column] / counts[column].where(counts[column] > 0)
+    return mean
+
+
+def _power_factor(sums, counts):
+    apparent = np.sqrt(sums['Global_active_power']**2 + sums['Global_reactive_power']**2)
+    return sums['Global_active_power'] / apparent.where(apparent > 0)
+
+
+# Per-bucket metrics from rollup sums and counts; NaN where a bucket has no readings
+METRICS = {
+    "energy_kwh": lambda sums, counts: sums['Global_active_power'] / 60,
+    "active_power_kw": _mean('Global_active_power'),
+    "reactive_power_kvar": _mean('Global_reactive_power'),
+    "power_factor": _power_factor,
+    "sub_metering_1": lambda sums, counts: sums['Sub_metering_1'],
+    "sub_metering_2": lambda sums, counts: sums['Sub_metering_2'],
+    "sub_metering_3": lambda sums, counts: sums['Sub_metering_3'],
+    "minutes": lambda sums, counts: counts['Global_active_power'],
+}
+
+
+def pick_granularity(start, end, max_points):
+    """The finest granularity with at most max_points buckets in [start, end] (else the coarsest)."""
+    span = pd.Timestamp(end).value - pd.Timestamp(start).value
+    for name, (_, width) in GRANULARITIES.items():
+        if span // width + 1 <= max_points:
+            return name
+    return name
+
+
+def _minute_hours(rollup):
+    """First hour and end of the last hour of rollup's minute data."""
+    first = pd.Timestamp(rollup.index[0]).floor('h')
+    last = pd.Timestamp(rollup.index[-1]).floor('h') + pd.Timedelta(hours=1)
+    return first, last
+
+
+def beyond(rollup, start, end):
+    """Whether [start, end] reaches hours outside rollup's minute data."""
+    first, last = _minute_hours(rollup)
+    return start < first or end >= last
+
+
+def aggregate(rollup, start, end, granularity, metrics, history=None):
+    """
+    Frame of metrics per granularity bucket for rows in [start, end], labelled by bucket start.
+
+    history: hourly RollupStore answering the hours of [start, end] before
+        and after the minute data of rollup (hour granularity or coarser)
+    """
+    freq = GRANULARITIES[granularity][0]
+    sums, counts = rollup.buckets(start, end, freq=freq)
+
+    if history is not None and len(rollup):
+        first, last = _minute_hours(rollup)
+        parts = [(sums, counts)]
+        if start < first:
+            parts.append(history.buckets(start, min(end, first - pd.Timedelta(1, unit='ns')), freq=freq))
+        if end >= last:
+            parts.append(history.buckets(max(start, last), end, freq=freq))
+        if len(parts) > 1:
+            # A bucket that straddles the minute data's edge gets both parts' sums
+            sums = pd.concat([part[0] for part in parts]).groupby(level=0).sum()
+            counts = pd.concat([part[1] for part in parts]).groupby(level=0).sum()
+
+    return pd.DataFrame({name: METRICS[name](sums, counts) for name in metrics}, index=sums.index)
@@ -0,0 +1,147 @@
+"""
+Incremental refresh of the fitted forests as data is ingested.
+
+A refresh does not refit a forest on the whole history: it fits a few new
+trees on the most recent rows (warm_start with a growing n_estimators) and
+retires as many of the oldest trees, so the forest keeps its size and a
+refresh costs the same whatever the length of the history. The new models
+are fitted next to the served ones, swapped in atomically and saved to the
+ModelRegistry, so a restart on the same data loads them.
+"""
+import copy
+import threading
+import time
+
+from sklearn.ensemble import RandomForestRegressor
+
+from estimators import CompiledForest
+from metrics import timed
+from model_registry import artifact_key
+from services import PREDICTORS
+
+
+def refresh_model(model, params, X, y, trees, seed, n_jobs=None):
+    """
+    Copy of the fitted forest model with trees new trees fitted on X, y and
+    its oldest trees retired; model itself is left untouched. params are
+    the predictor's PARAMS (used for a CompiledForest, which keeps none).
+    Returns None for a model that is not a forest.
+    """
+    if isinstance(model, RandomForestRegressor):
+        size = len(model.estimators_)
+        forest = copy.copy(model)
+        forest.estimators_ = list(model.estimators_)
+        forest.set_params(warm_start=True, n_estimators=size + trees, random_state=seed, n_jobs=n_jobs)
+        forest.fit(X, y)
+        forest.estimators_ = forest.estimators_[-size:]
+        return forest.set_params(warm_start=False, n_estimators=size, n_jobs=None)
+
+    if isinstance(model, CompiledForest):
+        forest = RandomForestRegressor(**{**params, "n_estimators": trees, "random_state": seed}, n_jobs=n_jobs)
+        return model.refreshed(forest.fit(X, y), len(model.roots))
+
+    return None
+
+
+class ForestRefresher:
+    """
+    Background scheduler refreshing the forests of the warm predictors.
+
+    Every interval seconds (0 never), each predictor whose training data
+    changed since its models were fitted gets refresh_model() on the last
+    REFRESH["window"] rows of its training sets, REFRESH["trees"] trees per
+    forest. The fits run single-threaded outside the services lock; the
+    component is then replaced by a copy carrying the new models, with
+    model_version set to the key of the data they were refreshed on, and
+    the models are saved in the registry under that key (replacing the
+    artifact of the same data, if any).
+
+    on_swap: called with the component name after each swap
+    """
+
+    def __init__(self, services, interval, on_swap=None):
+        self.services = services
+        self.interval = interval
+        self.on_swap = on_swap
+        self.reports = {}
+        self._cycle = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=30):
+        """Stop the scheduler, waiting up to timeout seconds for a refresh in progress to finish."""
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        # A refresh_all() requested through the API runs on another thread
+        if self._cycle.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            self._cycle.release()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh_all()
+            except Exception as e:
+                print(f"Model refresh failed: {e}")
+
+    def refresh_all(self, force=False):
+        """Refresh every warm predictor that needs it (all of them with force); returns their reports."""
+        with self._cycle:
+            reports = {}
+            for name in PREDICTORS:
+                if self.services.is_warm(name):
+                    report = self.refresh(name, force)
+                    if report is not None:
+                        reports[name] = report
+            return reports
+
+    @timed("refresh.predictor")
+    def refresh(self, name, force=False):
+        services = self.services
+        # A consistent snapshot: ingestion holds the same lock
+        with services.lock:
+            predictor = services.get(name)
+            refresh = getattr(predictor, "REFRESH", None)
+            if refresh is None:
+                return None
+            version = artifact_key(predictor)
+            if version == predictor.model_version and not force:
+                return None
+            sets = predictor.training_sets()
+            end = predictor.training_frame().index[-1]
+
+        start = time.perf_counter()
+        window, trees = refresh["window"], refresh["trees"]
+        # A new seed per data end, so successive refreshes grow different trees
+        seed = int(end.value // 10**9) % 2**31
+        models = {}
+        for attr, (X, y) in sets.items():
+            model = refresh_model(getattr(predictor, attr), predictor.PARAMS, X[-window:], y[-window:], trees, seed)
+            if model is not None:
+                models[attr] = model
+        if not models:
+            return None
+
+        fresh = services.swap(name, models, version)
+        if self.on_swap is not None:
+            self.on_swap(name)
+        try:
+            services.registry.save(fresh, key=version)
+        except OSError as e:
+            print(f"Could not save refreshed {name} models ({e}), they last until a restart")
+
+        report = {
+            "models": list(models), "trees": trees, "rows": min(window, len(X)),
+            "seconds": time.perf_counter() - start, "model_version": version,
+        }
+        self.reports[name] = report
+        print(f"{name} refreshed in {report['seconds']:.2f}s ({trees} new trees per forest on {report['rows']} rows)")
+        return report
@@ -0,0 +1,218 @@
+import numpy as np
+import pandas as pd
+
+from metrics import timed
+
+ROLLUP_COLUMNS = [
+    'Global_active_power',
+    'Global_reactive_power',
+    'Sub_metering_1',
+    'Sub_metering_2',
+    'Sub_metering_3',
+]
+
+HOUR_NS = 3600 * 10**9
+DAY_NS = 24 * HOUR_NS
+
+
+def _to_ns(ts):
+    return pd.Timestamp(ts).value
+
+
+def _bounds(start, end):
+    """[lo, stop) in ns for the inclusive range [start, end]; empty when end < start."""
+    lo, stop = _to_ns(start), _to_ns(end) + 1
+    return lo, max(stop, lo)
+
+
+class _Level:
+    """Prefix sums sampled at every bucket edge of a fixed-width level (hour/day)."""
+
+    def __init__(self, index, sums, counts, step):
+        self.step = step
+        first = index[0] // step * step
+        last = index[-1] // step * step + step
+        self.edges = np.arange(first, last + step, step, dtype=np.int64)
+
+        pos = np.searchsorted(index, self.edges, side='left')
+        self.pos = pos
+        self.sums = sums[pos]
+        self.counts = counts[pos]
+
+    def extend(self, index, sums, counts, since):
+        """Add edges up to the new last row and redo the ones after since."""
+        last = index[-1] // self.step * self.step + self.step
+        new_edges = np.arange(self.edges[-1] + self.step, last + self.step, self.step, dtype=np.int64)
+        self.edges = np.concatenate([self.edges, new_edges])
+
+        # Edges at or before since only cover rows that were already there;
+        # after a gap, the new edges before since were never computed
+        keep = min(np.searchsorted(self.edges, since, side='right'), len(self.pos))
+        pos = np.searchsorted(index, self.edges[keep:], side='left')
+        self.pos = np.concatenate([self.pos[:keep], pos])
+        self.sums = np.concatenate([self.sums[:keep], sums[pos]])
+        self.counts = np.concatenate([self.counts[:keep], counts[pos]])
+
+    def slots(self, ts):
+        """Row in the level arrays for every aligned ts, -1 where ts is not an edge."""
+        offset = ts - self.edges[0]
+        slot = offset // self.step
+        hit = (offset % self.step == 0) & (slot >= 0) & (slot < len(self.edges))
+        return np.where(hit, slot, -1)
+
+
+class RollupStore:
+    """
+    Cumulative sums of the minute data, so that the total of any time window
+    is the difference of two prefix rows instead of a rescan of the frame.
+
+    Prefix rows are kept at minute, hour and day resolution. Window bounds
+    that fall on an hour or day edge are answered by index arithmetic on the
+    coarser level; anything else is a binary search on the minute index.
+
+    Rows can also be pre-aggregated buckets given with their counts (the
+    hourly history of loader.load_rollup); windows then resolve to whole
+    buckets.
+    """
+
+    def __init__(self, df, columns=ROLLUP_COLUMNS, counts=None):
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+            counts = counts.sort_index() if counts is not None else None
+
+        self.columns = list(columns)
+        self._n = 0
+        self._index = np.empty(0, dtype=np.int64)
+        # Row i holds the total of every minute before row i
+        self._sums = np.zeros((1, len(self.columns)))
+        self._counts = np.zeros((1, len(self.columns)), dtype=np.int64)
+        self.levels = []
+        self.extend(df, counts)
+
+    @property
+    def index(self):
+        return self._index[:self._n]
+
+    @property
+    def sums(self):
+        return self._sums[:self._n + 1]
+
+    @property
+    def counts(self):
+        return self._counts[:self._n + 1]
+
+    def __len__(self):
+        return self._n
+
+    def _reserve(self, n):
+        # Grow the buffers geometrically so repeated appends stay amortised O(new rows)
+        if n <= len(self._index):
+            return
+        capacity = max(n, 2 * len(self._index))
+        for name in ('_index', '_sums', '_counts'):
+            old = getattr(self, name)
+            new = np.zeros((capacity + (name != '_index'),) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def extend(self, df, counts=None):
+        """
+        Append minute rows that are newer than every row already stored.
+
+        counts: frame of non-null readings per row and column, for rows that
+            are bucket sums (default: 1 for every non-NaN value)
+        """
+        if df.empty:
+            return
+        index = df.index.values.astype('datetime64[ns]').view(np.int64)
+        if self._n and index[0] <= self._index[self._n - 1]:
+            raise ValueError("rows must be newer than the last stored minute")
+
+        values = df[self.columns].to_numpy(dtype=np.float64)
+        if counts is None:
+            valid = ~np.isnan(values)
+        else:
+            valid = counts[self.columns].to_numpy(dtype=np.int64)
+
+        n, m = self._n, len(index)
+        self._reserve(n + m)
+        self._index[n:n + m] = index
+        self._sums[n + 1:n + m + 1] = self._sums[n] + np.cumsum(np.where(valid, values, 0.0), axis=0)
+        self._counts[n + 1:n + m + 1] = self._counts[n] + np.cumsum(valid, axis=0)
+        self._n = n + m
+
+        if not self.levels:
+            self.levels = [
+                _Level(self.index, self.sums, self.counts, DAY_NS),
+                _Level(self.index, self.sums, self.counts, HOUR_NS),
+            ]
+        else:
+            for level in self.levels:
+                level.extend(self.index, self.sums, self.counts, index[0])
+
+    def _prefix(self, ts):
+        """Prefix rows (sums, counts, row position) for exclusive bounds ts."""
+        ts = np.asarray(ts, dtype=np.int64)
+        pos = np.full(ts.shape, -1, dtype=np.int64)
+
+        todo = np.ones(ts.shape, dtype=bool)
+        for level in self.levels:
+            slot = level.slots(ts)
+            hit = todo & (slot >= 0)
+            pos[hit] = level.pos[slot[hit]]
+            todo &= ~hit
+
+        if todo.any():
+            pos[todo] = np.searchsorted(self.index, ts[todo], side='left')
+
+        return self.sums[pos], self.counts[pos], pos
+
+    @timed("rollup.totals")
+    def totals(self, start, end):
+        """
+        Sums and non-null counts per column for rows in [start, end].
+
+        end is inclusive, the same as df.loc[start:end] with timestamp bounds.
+        """
+        sums, counts, _ = self._prefix(_bounds(start, end))
+        return (
+            pd.Series(sums[1] - sums[0], index=self.columns),
+            pd.Series(counts[1] - counts[0], index=self.columns),
+        )
+
+    def rows(self, start, end):
+        """Number of minute rows in [start, end]."""
+        _, _, pos = self._prefix(_bounds(start, end))
+        return int(pos[1] - pos[0])
+
+    @timed("rollup.buckets")
+    def buckets(self, start, end, freq='D'):
+        """
+        Per-bucket sums and counts for rows in [start, end], one row per
+        calendar period of freq that contains data, labelled by the period
+        start (the same buckets as a groupby on the floored index).
+        """
+        lo, stop = _bounds(start, end)
+
+        if freq == 'min':
+            # Rows are minute-aligned, so every row is its own bucket
+            _, _, pos = self._prefix([lo, stop])
+            labels = pd.DatetimeIndex(self.index[pos[0]:pos[1]].view('datetime64[ns]'))
+            return (
+                pd.DataFrame(np.diff(self.sums[pos[0]:pos[1] + 1], axis=0), index=labels, columns=self.columns),
+                pd.DataFrame(np.diff(self.counts[pos[0]:pos[1] + 1], axis=0), index=labels, columns=self.columns),
+            )
+
+        # Period starts strictly inside the window split it into buckets
+        periods = pd.period_range(pd.Timestamp(lo), pd.Timestamp(stop), freq=freq)
+        bounds = periods.start_time.values.astype('datetime64[ns]').view(np.int64)
+        edges = np.concatenate([[lo], bounds[(bounds > lo) & (bounds < stop)], [stop]])
+
+        sums, counts, pos = self._prefix(edges)
+        labels = pd.DatetimeIndex(edges[:-1].view('datetime64[ns]')).to_period(freq).start_time
+
+        keep = np.diff(pos) > 0
+        return (
+            pd.DataFrame(np.diff(sums, axis=0)[keep], index=labels[keep], columns=self.columns),
+            pd.DataFrame(np.diff(counts, axis=0)[keep], index=labels[keep], columns=self.columns),
+        )
@@ -0,0 +1,95 @@
+"""
+Encodings of time-series frames, picked per request by content negotiation.
+
+    records  [{"date": ..., "col": ...}, ...], plain JSON (the default)
+    columns  {"t": [epoch ms, ...], "col": [...], ...}, column-oriented JSON
+    arrow    an Apache Arrow IPC stream with a timestamp[ms] "t" column
+
+columns is encoded with orjson straight from the NumPy arrays when it is
+installed, and with the json module otherwise; arrow needs pyarrow.
+"""
+import json
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+COLUMNS_TYPE = "application/vnd.wattsup.columns+json"
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+FORMATS = {"records": "application/json", "columns": COLUMNS_TYPE, "arrow": ARROW_TYPE}
+
+# An encoded response body, cacheable and sent as is
+Payload = namedtuple("Payload", ["body", "media_type"])
+
+
+class NotAcceptable(ValueError):
+    """The requested format is unknown or cannot be produced here."""
+
+
+def negotiate(accept=None, format=None):
+    """
+    Format name for a request: the explicit format parameter if given, else
+    the first media type of the Accept header that maps to a format.
+    """
+    if format is None:
+        media_types = [part.split(";")[0].strip() for part in (accept or "").split(",")]
+        format = next((name for media in media_types for name, t in FORMATS.items() if media == t), "records")
+    if format not in FORMATS:
+        raise NotAcceptable(f"Unknown format {format!r}, expected one of {list(FORMATS)}")
+    if format == "arrow" and pa is None:
+        raise NotAcceptable("Arrow responses need pyarrow, which is not installed")
+    return format
+
+
+def epoch_ms(index):
+    """Timestamps as int64 milliseconds since the Unix epoch."""
+    return pd.DatetimeIndex(index).as_unit("ms").asi8
+
+
+def columns(frame):
+    """{"t": epoch ms of the index, column: values, ...} as NumPy arrays."""
+    data = {"t": epoch_ms(frame.index)}
+    for name in frame.columns:
+        data[str(name)] = np.ascontiguousarray(frame[name].to_numpy())
+    return data
+
+
+def dumps(data):
+    """JSON bytes of a dict of arrays and plain values; NaN becomes null."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def plain(value):
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind == "f":
+                return [None if v != v else v for v in value.tolist()]
+            return value.tolist()
+        if isinstance(value, dict):
+            return {k: plain(v) for k, v in value.items()}
+        return value
+
+    return json.dumps(plain(data), separators=(",", ":")).encode()
+
+
+def encode(frame, format):
+    """Payload of a frame with a DatetimeIndex in the columns or arrow format."""
+    data = columns(frame)
+    if format == "columns":
+        return Payload(dumps(data), COLUMNS_TYPE)
+
+    t = data.pop("t")
+    table = pa.table({"t": pa.array(t, type=pa.timestamp("ms")), **data})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Payload(sink.getvalue().to_pybytes(), ARROW_TYPE)
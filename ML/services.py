@@ -0,0 +1,162 @@
+import copy
+import importlib
+import threading
+import time
+
+from loader import load_data, load_rollup
+from model_registry import ModelRegistry
+from rollup import RollupStore
+from store import TimeSeriesStore
+
+# Predictor components as (module, class), in warm-up order (cheapest and
+# most used first). Imported on first build: sklearn alone takes over a
+# second to import, which the analytics routes should not wait for.
+PREDICTORS = {
+    "predictor": ("predictor", "EnergyPredictor"),
+    "daily_eff": ("efficiency_predictor", "EfficiencyForecast7D"),
+    "hourly_predictor": ("predictor", "HourlyEnergyPredictor"),
+    "hourly_eff": ("efficiency_predictor", "EfficiencyForecast24H"),
+    "submeter": ("submeter_forecaster", "SubmeterForecaster"),
+}
+
+
+class Services:
+    """
+    The app's data and predictors, each built on first use.
+
+    "data" is the shared TimeSeriesStore plus its RollupStore, and
+    "history" a RollupStore of the hourly rollups of the whole source file,
+    beyond the minute window that load_data keeps; every
+    predictor loads its models from the registry (training them if none
+    match). Each component builds under its own lock, outside the shared
+    one: a predictor is built on a snapshot of the store and published
+    under the lock ingestion holds, after taking in any rows appended while
+    it was being built.
+    """
+
+    COMPONENTS = ("data", "history") + tuple(PREDICTORS)
+
+    def __init__(self, data_file, models_dir, options=None):
+        """
+        options: constructor options per predictor component,
+            e.g. {"hourly_predictor": {"strategy": "direct", "backend": "compiled"}}
+        """
+        self.data_file = data_file
+        self.options = options or {}
+        self.registry = ModelRegistry(models_dir)
+        self.lock = threading.RLock()
+        self._instances = {}
+        self._build_locks = {}
+        self._building = set()
+        self._errors = {}
+
+    def is_warm(self, name):
+        return name in self._instances
+
+    def get(self, name):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self.lock:
+            build_lock = self._build_locks.setdefault(name, threading.Lock())
+        # One build per component, while ingestion and other builds go on
+        with build_lock:
+            if name not in self._instances:
+                self._building.add(name)
+                start = time.perf_counter()
+                try:
+                    instance = self._build(name)
+                    with self.lock:
+                        self._catch_up(name, instance)
+                        self._instances[name] = instance
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                finally:
+                    self._building.discard(name)
+                self._errors.pop(name, None)
+                print(f"{name} ready in {time.perf_counter() - start:.2f}s")
+        return self._instances[name]
+
+    def _build(self, name):
+        if name == "data":
+            store = TimeSeriesStore(load_data(self.data_file))
+            return store, RollupStore(store.df)
+        if name == "history":
+            sums, counts = load_rollup(self.data_file, "h")
+            return RollupStore(sums, counts=counts)
+        module, cls = PREDICTORS[name]
+        predictor_cls = getattr(importlib.import_module(module), cls)
+        store = self.store
+        # Resampled on the live store, so the snapshot and later builds share the views
+        for freq in ("h", "D"):
+            store.resampled(freq)
+        predictor = predictor_cls(store.snapshot(), train=False, **self.options.get(name, {}))
+        return self.registry.load_or_train(predictor)
+
+    def _catch_up(self, name, predictor):
+        # Called under self.lock: move a predictor built on a snapshot to
+        # the live store, updating it with the rows ingested since
+        if name not in PREDICTORS:
+            return
+        store, rows = self.store, len(predictor.store.df)
+        predictor.store = store
+        if len(store.df) > rows:
+            predictor.update(store.df.index[rows])
+
+    @property
+    def store(self):
+        return self.get("data")[0]
+
+    @property
+    def rollup(self):
+        return self.get("data")[1]
+
+    @property
+    def history(self):
+        return self.get("history")
+
+    def swap(self, name, models, version):
+        """
+        Replace warm component name by a copy carrying new fitted models
+        ({attribute: model}) and model_version. The swap is one assignment:
+        a request holding the old instance finishes with the old models.
+        """
+        with self.lock:
+            fresh = copy.copy(self._instances[name])
+            for attr, model in models.items():
+                setattr(fresh, attr, model)
+            fresh.model_version = version
+            self._instances[name] = fresh
+        return fresh
+
+    def warm_predictors(self):
+        """The predictors built so far (the ones ingestion must update)."""
+        return [self._instances[name] for name in PREDICTORS if name in self._instances]
+
+    def status(self):
+        components = {}
+        for name in self.COMPONENTS:
+            if name in self._instances:
+                components[name] = "warm"
+            elif name in self._building:
+                components[name] = "building"
+            elif name in self._errors:
+                components[name] = f"failed: {self._errors[name]}"
+            else:
+                components[name] = "cold"
+        return components
+
+    def warm_up(self):
+        for name in self.COMPONENTS:
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Warm-up of {name} failed: {e}")
+
+    def start_warm_up(self):
+        """Build every component in a background thread."""
+        thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,107 @@
+import copy
+import threading
+
+import numpy as np
+import pandas as pd
+
+from incremental import numeric_columns, resample_tail, splice
+from metrics import timed
+
+
+class TimeSeriesStore:
+    """
+    The minute data, held once and shared read-only by every predictor.
+
+    Numeric columns are kept as float32 on the DatetimeIndex (int64
+    nanoseconds underneath, see index_ns). Hourly and daily bucket means of
+    all numeric columns are computed once on first use and handed out as
+    shared views; callers that add columns must work on their own copy.
+
+    The first append moves the rows into preallocated index and value
+    buffers with spare capacity; df is then a view of their filled part, so
+    an append only writes the new rows, and the buffers are reallocated
+    (doubling) only when full. Rows of a df already handed out are never
+    written again.
+    """
+
+    def __init__(self, df):
+        columns = numeric_columns(df)
+        downcast = {col: np.float32 for col in columns if df[col].dtype != np.float32}
+        self.df = df[columns].astype(downcast) if downcast else df[columns]
+        self._index = None
+        self._values = None
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """Store frozen at the current rows, sharing their data and the cached views."""
+        with self._lock:
+            frozen = copy.copy(self)
+            frozen._views = dict(self._views)
+        frozen._index = frozen._values = None
+        frozen._lock = threading.Lock()
+        return frozen
+
+    @property
+    def index_ns(self):
+        return self.df.index.values.astype('datetime64[ns]').view(np.int64)
+
+    def resampled(self, freq):
+        """Bucket means of every column at freq ('h' or 'D'), cached."""
+        view = self._views.get(freq)
+        if view is None:
+            with self._lock:
+                view = self._views.get(freq)
+                if view is None:
+                    with timed(f"store.resample.{freq}"):
+                        view = self.df.resample(freq).mean()
+                    self._views[freq] = view
+        return view
+
+    @property
+    def hourly(self):
+        return self.resampled('h')
+
+    @property
+    def daily(self):
+        return self.resampled('D')
+
+    @timed("store.append")
+    def append(self, new_df):
+        """
+        Append minute rows newer than the stored ones.
+
+        Cached views only re-aggregate the buckets the new rows fall into.
+        Returns the first new timestamp, for the predictors' update(since).
+        """
+        new_df = new_df[self.df.columns].astype(self.df.dtypes.to_dict())
+        since = new_df.index[0]
+
+        with self._lock:
+            self.df = self._write_tail(new_df)
+            for freq, view in list(self._views.items()):
+                tail = resample_tail(self.df, freq, since)
+                self._views[freq] = splice(view, tail, tail.index[0])
+
+        return since
+
+    def _write_tail(self, new_df):
+        # The stored frame extended by new_df, written into the buffers
+        size, extra = len(self.df), len(new_df)
+        if self._values is None or size + extra > len(self._index):
+            self._grow(max(2 * size, size + extra))
+        self._index[size:size + extra] = new_df.index.values.astype('datetime64[ns]').view(np.int64)
+        self._values[size:size + extra] = new_df.to_numpy(dtype=np.float32)
+
+        size += extra
+        index = pd.DatetimeIndex(self._index[:size].view('datetime64[ns]'), name=self.df.index.name, copy=False)
+        return pd.DataFrame(self._values[:size], index=index, columns=self.df.columns, copy=False)
+
+    def _grow(self, capacity):
+        # Column-major, so every column of df stays contiguous
+        size = len(self.df)
+        index = np.empty(capacity, dtype=np.int64)
+        values = np.empty((capacity, len(self.df.columns)), dtype=np.float32, order='F')
+        index[:size] = self.index_ns
+        values[:size] = self.df.to_numpy(dtype=np.float32)
+        self._index, self._values = index, values
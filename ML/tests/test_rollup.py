@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rollup import ROLLUP_COLUMNS, RollupStore
+
+
+def minutes(start, periods, seed=0):
+    index = pd.date_range(start, periods=periods, freq="min", name="datetime")
+    values = np.random.default_rng(seed).random((periods, len(ROLLUP_COLUMNS)))
+    return pd.DataFrame(values, index=index, columns=ROLLUP_COLUMNS)
+
+
+@pytest.mark.parametrize("gap", [pd.Timedelta(hours=3), pd.Timedelta(weeks=3)])
+def test_extend_after_a_gap_matches_a_fresh_store(gap):
+    old = minutes("2007-03-01 00:00", 14 * 60)
+    new = minutes(old.index[-1] + gap, 5 * 60, seed=1)
+
+    extended = RollupStore(old)
+    extended.extend(new)
+    fresh = RollupStore(pd.concat([old, new]))
+
+    for level, expected in zip(extended.levels, fresh.levels):
+        assert np.array_equal(level.edges, expected.edges)
+        assert np.array_equal(level.pos, expected.pos)
+
+    start, end = new.index[0].floor("h"), new.index[-1]
+    for a, b in zip(extended.totals(start, end), fresh.totals(start, end)):
+        pd.testing.assert_series_equal(a, b)
+    for freq in ("h", "D"):
+        for a, b in zip(extended.buckets(old.index[0], end, freq), fresh.buckets(old.index[0], end, freq)):
+            pd.testing.assert_frame_equal(a, b)
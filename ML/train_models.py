@@ -0,0 +1,57 @@
+"""
+Train every forecasting model offline and store it in the model registry.
+
+    python train_models.py [--data household_power_cleaned.xlsx] [--models models] [--workers N]
+
+Models are fitted in parallel worker processes (see training.py).
+app.py then only loads the saved artifacts at startup.
+"""
+import argparse
+import os
+
+from training import train_all
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_n_jobs(values):
+    """["4"] -> 4, ["EnergyPredictor.model=2", ...] -> {"EnergyPredictor.model": 2, ...}"""
+    if not values:
+        return None
+    if len(values) == 1 and "=" not in values[0]:
+        return int(values[0])
+    return {name: int(jobs) for name, jobs in (v.split("=", 1) for v in values)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default=os.path.join(HERE, "household_power_cleaned.xlsx"))
+    parser.add_argument("--models", default=os.path.join(HERE, "models"))
+    parser.add_argument("--force", action="store_true", help="retrain even if an artifact exists")
+    parser.add_argument("--workers", type=int, help="training processes (default: one per model, up to the core count)")
+    parser.add_argument(
+        "--n-jobs", nargs="+",
+        help="cores per model: one number for all, or Predictor.attr=N pairs (default: cores / workers)",
+    )
+    parser.add_argument(
+        "--strategy", nargs="+", default=[],
+        help="Predictor=direct pairs for predictors that support direct forecasting (default: recursive)",
+    )
+    parser.add_argument(
+        "--backend", nargs="+", default=[],
+        help="Predictor=backend pairs, backends: forest, forest_limited, hist_gb, compiled (default: forest)",
+    )
+    args = parser.parse_args(argv)
+
+    options = {}
+    for option, pairs in (("strategy", args.strategy), ("backend", args.backend)):
+        for name, value in (item.split("=", 1) for item in pairs):
+            options.setdefault(name, {})[option] = value
+    train_all(
+        args.data, args.models, workers=args.workers, n_jobs=parse_n_jobs(args.n_jobs),
+        force=args.force, options=options,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Fit the forecasting models in parallel, one process per model.
+
+Each task is one fitted estimator (EfficiencyForecast24H contributes two).
+Workers load the data themselves through the on-disk cache, fit with their
+share of the cores and save straight into the ModelRegistry, so only small
+timing reports travel back to the parent.
+"""
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from predictor import EnergyPredictor, HourlyEnergyPredictor
+from efficiency_predictor import EfficiencyForecast24H, EfficiencyForecast7D
+from submeter_forecaster import SubmeterForecaster
+from loader import load_data
+from model_registry import ModelRegistry
+from store import TimeSeriesStore
+
+PREDICTORS = [EnergyPredictor, HourlyEnergyPredictor, EfficiencyForecast24H, EfficiencyForecast7D, SubmeterForecaster]
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _train_task(data_file, models_root, name, attr, n_jobs, options=None):
+    """Fit and save one model of predictor class name; runs in a worker process."""
+    cls = next(c for c in PREDICTORS if c.__name__ == name)
+    predictor = cls(TimeSeriesStore(load_data(data_file)), train=False, **(options or {}).get(name, {}))
+
+    start = time.perf_counter()
+    if len(cls.MODELS) > 1:
+        predictor._train_model(models=[attr], n_jobs=n_jobs)
+    else:
+        predictor._train_model(n_jobs=n_jobs)
+    seconds = time.perf_counter() - start
+
+    key = ModelRegistry(models_root).save(predictor, [attr])
+    return {"model": f"{name}.{attr}", "key": key, "seconds": seconds, "n_jobs": n_jobs, "peak_rss_mb": _peak_rss_mb()}
+
+
+def stale_tasks(store, registry, force=False, options=None):
+    """(predictor name, model attribute) pairs whose artifact is missing."""
+    tasks = []
+    for cls in PREDICTORS:
+        predictor = cls(store, train=False, **(options or {}).get(cls.__name__, {}))
+        if registry.has(predictor) and not force:
+            print(f"{cls.__name__}: up to date ({registry.path(predictor)})")
+            continue
+        tasks.extend((cls.__name__, attr) for attr in cls.MODELS)
+    return tasks
+
+
+def train_all(data_file, models_root, workers=None, n_jobs=None, force=False, options=None):
+    """
+    Train every stale model and return the per-model reports.
+
+    workers: processes to fit in (default: one per model, capped at the core count)
+    n_jobs: cores per model, an int or a {"Predictor.attr": int} mapping;
+            by default the cores are split evenly between the workers
+    options: constructor options per predictor name,
+             e.g. {"HourlyEnergyPredictor": {"strategy": "direct", "backend": "compiled"}}
+    """
+    registry = ModelRegistry(models_root)
+    tasks = stale_tasks(TimeSeriesStore(load_data(data_file)), registry, force, options)
+    if not tasks:
+        return []
+
+    cores = os.cpu_count() or 1
+    workers = workers or min(len(tasks), cores)
+    default_jobs = max(1, cores // workers)
+    per_model = n_jobs if isinstance(n_jobs, dict) else {}
+    if isinstance(n_jobs, int):
+        default_jobs = n_jobs
+
+    start = time.perf_counter()
+    reports = []
+    # A fresh process per task, so each peak RSS belongs to one model
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        futures = [
+            pool.submit(
+                _train_task, data_file, models_root, name, attr,
+                per_model.get(f"{name}.{attr}", default_jobs), options,
+            )
+            for name, attr in tasks
+        ]
+        for future in as_completed(futures):
+            report = future.result()
+            reports.append(report)
+            print(
+                f"{report['model']}: {report['seconds']:.1f}s with n_jobs={report['n_jobs']}, "
+                f"peak RSS {report['peak_rss_mb']:.0f} MB"
+            )
+
+    wall = time.perf_counter() - start
+    busy = sum(r["seconds"] for r in reports)
+    print(f"Trained {len(reports)} models on {workers} workers in {wall:.1f}s ({busy:.1f}s of fitting)")
+    return reports
@@ -86,40 +86,33 @@ const Forecast = () => {
     useEffect(() => {
         const fetchData = async () => {
             try {
-                const resForecast = await fetch("http://127.0.0.1:8000/predict_next_7_days");
-                const jsonForecast = await resForecast.json();
-                const transformed = transformForecast(jsonForecast.forecast);
+                // Every widget of the page in one request
+                const res = await fetch(
+                    "http://127.0.0.1:8000/dashboard?widgets=predict_next_7_days,predict_next_24_hours,efficiency_7_days,efficiency_24_hours,month_average&month_start=2007-12-01"
+                );
+                const dashboard = await res.json();
+
+                const transformed = transformForecast(dashboard.predict_next_7_days.forecast);
                 setForecastList(transformed);
 
-                const resForecast24Hours = await fetch("http://127.0.0.1:8000/predict_next_24_hours");
-                const jsonForecast24Hours = await resForecast24Hours.json();
-                const transformed24Hours = transformHourlyForecast(jsonForecast24Hours)
+                const transformed24Hours = transformHourlyForecast(dashboard.predict_next_24_hours)
                 setForecastList24Hours(transformed24Hours)
 
                 // 7-day efficiency forecast
-                const resEfficiency7D = await fetch("http://127.0.0.1:8000/efficiency_7_days");
-                const jsonEfficiency7D = await resEfficiency7D.json();
-                const transformedEfficiency7D = jsonEfficiency7D.map(item => ({
+                const transformedEfficiency7D = dashboard.efficiency_7_days.map(item => ({
                     date: new Date(item.date),
                     value: item.Predicted_Efficiency
                 }));
                 setEfficiency7D(transformedEfficiency7D);
 
                 // 24-hour efficiency forecast
-                const resEfficiency24H = await fetch("http://127.0.0.1:8000/efficiency_24_hours");
-                const jsonEfficiency24H = await resEfficiency24H.json();
-                const transformedEfficiency24H = jsonEfficiency24H.map(item => ({
+                const transformedEfficiency24H = dashboard.efficiency_24_hours.map(item => ({
                     datetime: new Date(item.datetime),
                     value: item.Power_factor_pred
                 }));
                 setEfficiency24H(transformedEfficiency24H);
 
-
-                const resMonth = await fetch(
-                    "http://127.0.0.1:8000/get_month_average?start_date=2007-12-01"
-                );
-                const jsonMonth = await resMonth.json();
-                setMonthAverage(jsonMonth);
+                setMonthAverage(dashboard.month_average);
 
             } catch (error) {
                 console.error("Error fetching data:", error);
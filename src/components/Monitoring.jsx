@@ -11,53 +11,50 @@ const Monitoring = () => {
         totalConsumption: 20 // kWh (daily limit example)
     };
 
-    const [dataPoints, setDataPoints] = useState(Array(30).fill(0).map(() => Math.random() * 2 + 10));
+    const [dataPoints, setDataPoints] = useState(Array(30).fill(0));
     const [labels, setLabels] = useState(Array(30).fill('').map((_, i) => i));
     const [voltage, setVoltage] = useState(240);
-    const [totalConsumption, setTotalConsumption] = useState(12.5);
-    const [submeters, setSubmeters] = useState([4.2, 3.1, 5.2]);
+    const [totalConsumption, setTotalConsumption] = useState(0);
+    const [submeters, setSubmeters] = useState([0, 0, 0]);
     const [activeAlert, setActiveAlert] = useState(null);
 
     // Submeter Names
     const submeterNames = ["Kitchen", "Laundry Room", "Water Heater & AC"];
 
     useEffect(() => {
-        const interval = setInterval(() => {
-            // Simulate Data
-            const newLiveValue = Math.random() * 5 + 9; // Random between 9 and 14
-            const newVoltage = 225 + Math.random() * 30; // Random between 225 and 255 (often out of range)
+        // Minute readings pushed by the server, with its rolling stats and alerts
+        const source = new EventSource("http://127.0.0.1:8000/live/stream");
+
+        source.onmessage = (event) => {
+            const reading = JSON.parse(event.data);
+            const values = reading.values;
+            const newLiveValue = values.Global_active_power ?? 0;
+            // Sub-meters are kWh per minute; the cards show kW
             const newSubmeters = [
-                Math.random() * 4 + 2, // 2-6
-                Math.random() * 4 + 2, // 2-6
-                Math.random() * 4 + 2  // 2-6
+                (values.Sub_metering_1 ?? 0) * 60,
+                (values.Sub_metering_2 ?? 0) * 60,
+                (values.Sub_metering_3 ?? 0) * 60
             ];
 
             // Update Chart Data
-            setDataPoints(prev => {
-                const newData = [...prev.slice(1), newLiveValue];
-                return newData;
-            });
+            setDataPoints(prev => [...prev.slice(1), newLiveValue]);
+            setLabels(prev => [...prev.slice(1), reading.time.slice(11, 16)]);
 
-            setVoltage(newVoltage);
-            setTotalConsumption(prev => prev + (Math.random() * 0.01));
-            setSubmeters(newSubmeters);
-
-            // Check for Alerts
-            let alertMsg = null;
-            if (newLiveValue > THRESHOLDS.liveConsumption) {
-                alertMsg = `High Live Consumption: ${newLiveValue.toFixed(1)} kW`;
-            } else if (newVoltage < THRESHOLDS.voltage.min || newVoltage > THRESHOLDS.voltage.max) {
-                alertMsg = `Unstable Voltage: ${newVoltage.toFixed(1)} V`;
-            } else if (newSubmeters.some(val => val > THRESHOLDS.submeter)) {
-                const idx = newSubmeters.findIndex(val => val > THRESHOLDS.submeter);
-                alertMsg = `High Usage in ${submeterNames[idx]}: ${newSubmeters[idx].toFixed(1)} kW`;
+            if (values.Voltage != null) {
+                setVoltage(values.Voltage);
             }
+            setTotalConsumption(reading.today_kwh);
+            setSubmeters(newSubmeters);
 
-            setActiveAlert(alertMsg);
+            // Alerts are raised server-side
+            setActiveAlert(reading.alerts.length > 0 ? reading.alerts[0].message : null);
+        };
 
-        }, 2000); // Update every 2 seconds
+        source.onerror = (error) => {
+            console.error("Live stream error:", error);
+        };
 
-        return () => clearInterval(interval);
+        return () => source.close();
     }, []);
 
     // Determine Status Colors
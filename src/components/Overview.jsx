@@ -30,13 +30,14 @@ const Overview = ({ setActiveTab }) => {
     useEffect(() => {
         const loadAll = async () => {
             try {
-                const [perfRes, weeklyRes] = await Promise.all([
-                    fetch("http://127.0.0.1:8000/get_energy_performance?start_date=2007-11-29"),
-                    fetch("http://127.0.0.1:8000/compare_weeks?start=2007-11-29")
-                ]);
-
-                const perfData = await perfRes.json();
-                const weeklyData = await weeklyRes.json();
+                // Both widgets in one request
+                const res = await fetch(
+                    "http://127.0.0.1:8000/dashboard?widgets=energy_performance,compare_weeks&week_start=2007-11-29"
+                );
+                const dashboard = await res.json();
+
+                const perfData = dashboard.energy_performance;
+                const weeklyData = dashboard.compare_weeks;
 
                 const transformed = {
                     AC: perfData.map(d => d.Sub_metering_3),